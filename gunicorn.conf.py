@@ -0,0 +1,27 @@
+# Production serving profile: gunicorn -c gunicorn.conf.py src.main:app
+#
+# Several uvicorn worker processes behind one port. The app is imported once
+# before fork (preload), so YAML config, prompt templates, routing tables and
+# the embedder are loaded once and shared copy-on-write. Per-process state
+# that would otherwise be duplicated is shared through files: the local
+# vector index is memory-mapped (one copy in the page cache), and embeddings
+# and answers go through the SQLite cache at SHARED_CACHE_PATH. Only one
+# worker (see SYNC_LOCK_PATH) runs the startup sync and the scheduler.
+import multiprocessing
+import os
+
+os.environ.setdefault("SHARED_CACHE_PATH", os.path.join("src", "data", "shared_cache.db"))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+# The preloaded app reads it too (e.g. to keep chat sessions in Mongo)
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot accumulate
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+accesslog = "-"
@@ -0,0 +1,197 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional
+
+from src.tenants import current_tenant
+
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "10"))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+# Requests whose expected queue wait exceeds this are shed with 503
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+# Authenticated clients (API_KEYS names, e.g. executive dashboards) served ahead of everyone else
+PRIORITY_CLIENTS = {c.strip() for c in os.getenv("PRIORITY_CLIENTS", "").split(",") if c.strip()}
+
+HIGH_PRIORITY = 0
+NORMAL_PRIORITY = 1
+# Index syncs: only granted a slot when no request is waiting
+BACKGROUND_PRIORITY = 2
+
+# Priority of the request being served; asyncio tasks inherit it from the endpoint
+current_priority = contextvars.ContextVar("current_priority", default=NORMAL_PRIORITY)
+
+
+class Overloaded(Exception):
+    """Raised when a request would wait longer than its deadline for a slot"""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before its answer was ready"""
+
+
+def priority_for(client_id: str, authenticated: bool) -> int:
+    # Unauthenticated callers can pick any name, so they never get priority
+    return HIGH_PRIORITY if authenticated and client_id in PRIORITY_CLIENTS else NORMAL_PRIORITY
+
+
+class RateLimiter:
+    """Per-client token buckets: `rate` tokens per second, up to `burst` saved"""
+
+    def __init__(self, per_minute: float = RATE_LIMIT_PER_MINUTE, burst: int = RATE_LIMIT_BURST,
+                 max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()  # client -> [tokens, last refill]
+
+    def check(self, client_id: str, cost: float = 1) -> float:
+        """Take `cost` tokens; returns 0 if allowed, else seconds until it would be"""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        bucket = self._buckets.pop(client_id, None) or [float(self.burst), now]
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        self._buckets[client_id] = bucket
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+        cost = min(cost, self.burst)
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+        return (cost - bucket[0]) / self.rate
+
+
+class PriorityLimiter:
+    """Bounded concurrency for one pipeline stage, with a priority queue.
+
+    Waiters are served lowest priority value first; within a priority,
+    tenants are interleaved by start-time fair queuing (each queued request
+    is tagged one past its tenant's previous tag or the current virtual
+    time, whichever is later), so a tenant with a deep backlog cannot starve
+    another tenant's occasional request. A request
+    is shed with Overloaded up front when its estimated wait (queue ahead of
+    it times the average service time) exceeds `max_wait`, and also if it
+    actually waits that long.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_wait: float = ADMISSION_MAX_WAIT_SECONDS):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_wait = max_wait
+        self.active = 0
+        self.shed = 0
+        self.avg_service = 1.0  # seconds, exponentially weighted
+        self._waiters = []
+        self._seq = itertools.count()
+        self._vtime = 0  # tag of the last waiter granted a slot
+        self._tenant_tags: Dict[str, int] = {}
+
+    def estimated_wait(self, priority: int) -> float:
+        ahead = sum(1 for p, _, _, f in self._waiters if p <= priority and not f.done())
+        if self.active < self.concurrency and not ahead:
+            return 0.0
+        return (ahead + 1) / self.concurrency * self.avg_service
+
+    async def acquire(self, priority: Optional[int] = None, max_wait: Optional[float] = None):
+        priority = current_priority.get() if priority is None else priority
+        max_wait = self.max_wait if max_wait is None else max_wait
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            return
+        if self.estimated_wait(priority) > max_wait:
+            self.shed += 1
+            raise Overloaded(f"{self.name} is overloaded (estimated wait over {max_wait:g}s)")
+
+        tenant = current_tenant.get()
+        tag = max(self._vtime, self._tenant_tags.get(tenant, 0)) + 1
+        self._tenant_tags[tenant] = tag
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, tag, next(self._seq), future))
+        try:
+            await asyncio.wait_for(future, max_wait)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            raise Overloaded(f"{self.name} is overloaded (waited {max_wait:g}s)")
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancel
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        if self.active > self.concurrency:
+            # Shrunk by resize(): retire the slot instead of handing it over
+            self.active -= 1
+            return
+        # Hand the slot straight to the next live waiter, if any
+        while self._waiters:
+            _, tag, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._vtime = max(self._vtime, tag)
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def resize(self, concurrency: int):
+        """Change the number of slots; extra slots go to queued waiters right away"""
+        self.concurrency = concurrency
+        while self.active < self.concurrency and self._waiters:
+            self.active += 1
+            self.release()
+
+    def _observe(self, seconds: float):
+        self.avg_service = 0.8 * self.avg_service + 0.2 * seconds
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None):
+        await self.acquire(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._observe(time.perf_counter() - start)
+            self.release()
+
+    async def run_in_thread(self, fn: Callable, *args, priority: Optional[int] = None,
+                            max_wait: Optional[float] = None):
+        """Run blocking `fn` in a thread while holding a slot.
+
+        A thread cannot be interrupted, so if the caller is cancelled the
+        slot stays taken until the thread actually finishes.
+        """
+        await self.acquire(priority, max_wait)
+        start = time.perf_counter()
+        task = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+
+        def done(_task):
+            self._observe(time.perf_counter() - start)
+            self.release()
+
+        task.add_done_callback(done)
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {"active": self.active, "queued": len(self._waiters), "shed": self.shed,
+                "avg_service_seconds": round(self.avg_service, 3)}
+
+
+async def cancel_on_disconnect(request, coro, poll_seconds: float = 0.5):
+    """Await `coro`, cancelling it if the HTTP client disconnects first"""
+    task = asyncio.ensure_future(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            raise ClientDisconnected("Client disconnected")
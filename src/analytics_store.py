@@ -0,0 +1,400 @@
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.metadata_filters import TRANSACTION_RE
+from src.tenants import current_tenant, tenant_path
+
+ANALYTICS_DB_PATH = os.getenv("ANALYTICS_DB_PATH", os.path.join(os.path.dirname(__file__), "data", "analytics.db"))
+
+# Full fraud row: "Transaction 15: Type: CASH_OUT, Amount: 229133.94, Originator: C905080434
+# (Balance Before: 15325.00, After: 0.00), Recipient: C476402209 (Balance Before: 5083.00, After: 51513.44)"
+FRAUD_ROW_RE = re.compile(
+    r"Transaction\s+(?P<transaction>\d+):\s*Type:\s*(?P<type>[A-Z_]+),\s*Amount:\s*(?P<amount>[0-9.]+)"
+    r"(?:,\s*Originator:\s*(?P<originator>\w+)\s*\(Balance Before:\s*(?P<orig_before>[0-9.]+),\s*After:\s*(?P<orig_after>[0-9.]+)\))?"
+    r"(?:,\s*Recipient:\s*(?P<recipient>\w+)\s*\(Balance Before:\s*(?P<dest_before>[0-9.]+),\s*After:\s*(?P<dest_after>[0-9.]+)\))?"
+)
+
+AGGREGATES = [
+    ("COUNT", re.compile(r"\b(how many|count|number of)\b")),
+    ("AVG", re.compile(r"\b(average|avg|mean)\b")),
+    ("MAX", re.compile(r"\b(max|maximum|highest|largest|biggest)\b")),
+    ("MIN", re.compile(r"\b(min|minimum|lowest|smallest)\b")),
+    ("SUM", re.compile(r"\b(total|totals|sum)\b")),
+]
+# "top products by sales": a ranking of group totals, only with a group and a measure
+RANKING_RE = re.compile(r"\b(top|most|best|leading)\s+(?:(\d+)\s+)?([a-z][a-z_-]*)")
+# "which region has the highest sales": the group a superlative picks out
+WHICH_RE = re.compile(r"\b(?:which|what)\s+([a-z][a-z_-]*)")
+LOWEST_RE = re.compile(r"\b(min|minimum|lowest|smallest|least|fewest|worst|bottom)\b")
+RANKING_LIMIT = 20
+# Words naming a numeric measure without using its column name
+MEASURE_WORDS = {
+    "sales": ("sales", "revenue", "sold"),
+    "amount": ("amount", "amounts", "value", "volume", "money", "paid", "spent"),
+}
+COMPARISON_RE = re.compile(
+    r"\b(over|above|more than|greater than|exceeding|at least|under|below|less than|at most)\s+\$?\s*([0-9][0-9,]*(?:\.[0-9]+)?)\s*([km])?\b"
+)
+COMPARISON_OPS = {
+    "over": ">", "above": ">", "more than": ">", "greater than": ">", "exceeding": ">", "at least": ">=",
+    "under": "<", "below": "<", "less than": "<", "at most": "<=",
+}
+GROUP_BY_RE = re.compile(r"\b(?:by|per|for each|each)\s+([a-z][a-z _-]*)")
+DOMAIN_HINTS = {
+    "revenue": ("sales", "revenue", "order", "region", "customer", "product", "segment", "category"),
+    "fraud": ("transaction", "fraud", "cash_out", "cash out", "payment", "transfer", "amount"),
+}
+
+
+def _column_name(header: str) -> str:
+    name = re.sub(r"[^0-9a-z]+", "_", header.strip().lower()).strip("_")
+    return name or "column"
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if word.endswith("s") and not word.endswith("ss") else word
+
+
+def _number(value: str) -> Optional[float]:
+    try:
+        return float(value.replace(",", ""))
+    except (ValueError, AttributeError):
+        return None
+
+
+def parse_table(content: str) -> Optional[Dict[str, List]]:
+    """Parse TSV/CSV text (header row + data rows) into named columns"""
+    lines = [line for line in content.splitlines() if line.strip()]
+    if len(lines) < 2:
+        return None
+    delimiter = "\t" if "\t" in lines[0] else ("," if "," in lines[0] else None)
+    if delimiter is None:
+        return None
+    headers = [_column_name(h) for h in lines[0].split(delimiter)]
+    if len(headers) < 2:
+        return None
+    if delimiter == ",":
+        import csv
+        rows = list(csv.reader(lines[1:]))
+    else:
+        rows = [line.split(delimiter) for line in lines[1:]]
+    rows = [r for r in rows if len(r) == len(headers)]
+    if not rows:
+        return None
+    columns = {}
+    for j, header in enumerate(headers):
+        values = [r[j].strip() for r in rows]
+        numbers = [_number(v) for v in values]
+        # Identifier-like columns (postal codes, row ids) stay text
+        if all(n is not None for n in numbers) and not header.endswith(("_id", "code")) and header != "row_id":
+            columns[header] = numbers
+        else:
+            columns[header] = values
+    return columns
+
+
+def parse_fraud_rows(content: str) -> Optional[Dict[str, List]]:
+    """Parse 'Transaction N: Type: X, Amount: Y, ...' rows into columns"""
+    matches = [m.groupdict() for m in FRAUD_ROW_RE.finditer(content)]
+    if not matches:
+        return None
+    numeric = {"amount", "orig_before", "orig_after", "dest_before", "dest_after"}
+    columns = {}
+    for key in matches[0]:
+        values = [m[key] for m in matches]
+        columns[key] = [_number(v) if v is not None else None for v in values] if key in numeric else values
+    return columns
+
+
+class AnalyticsStore:
+    """Columnar copy of tabular uploads in an embedded SQLite database.
+
+    Sync parses each input document's `content` (TSV/CSV tables, fraud
+    transaction rows) into a per-domain table (`revenue_rows`, `fraud_rows`,
+    ...). Aggregate questions are then answered with SQL over those tables
+    instead of asking the LLM to add up numbers in retrieved text.
+    """
+
+    def __init__(self, path: str = ANALYTICS_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self._schema_cache: Dict[str, Dict[str, str]] = {}
+        self._values_cache: Dict[str, Dict[str, List[str]]] = {}
+        self._data_version = None
+
+    def _refresh_caches(self):
+        # PRAGMA data_version changes when another connection (the worker
+        # running the sync) commits, so schema and value caches drop then
+        with self.lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._data_version:
+                self._data_version = version
+                self._schema_cache.clear()
+                self._values_cache.clear()
+
+    # --- ingestion ---
+    def _columns(self, table) -> Dict[str, str]:
+        if table not in self._schema_cache:
+            rows = self.conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+            self._schema_cache[table] = {r[1]: r[2] for r in rows}
+        return self._schema_cache[table]
+
+    def tables(self) -> List[str]:
+        rows = self.conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%_rows'").fetchall()
+        return [r[0] for r in rows]
+
+    def ingest(self, domain: str, doc_id: str, content: Any, source: Optional[str] = None) -> int:
+        """Replace the rows of `doc_id` (from collection or file `source`) in the domain table; returns rows stored"""
+        if not isinstance(content, str) or not content.strip():
+            return 0
+        columns = parse_fraud_rows(content) if TRANSACTION_RE.search(content) else parse_table(content)
+        if not columns:
+            return 0
+        table = f"{domain}_rows"
+        n_rows = len(next(iter(columns.values())))
+        with self.lock:
+            self._refresh_caches()
+            existing = self._columns(table)
+            if not existing:
+                self.conn.execute(f'CREATE TABLE "{table}" ("_doc_id" TEXT)')
+                self.conn.execute(f'CREATE INDEX "{table}_doc" ON "{table}" ("_doc_id")')
+                existing["_doc_id"] = "TEXT"
+            if "_source" not in existing:
+                self.conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "_source" TEXT')
+                existing["_source"] = "TEXT"
+            for name, values in columns.items():
+                if name not in existing:
+                    kind = "REAL" if any(isinstance(v, float) for v in values) else "TEXT"
+                    self.conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {kind}')
+                    existing[name] = kind
+            names = ["_doc_id", "_source"] + list(columns)
+            placeholders = ", ".join("?" for _ in names)
+            quoted = ", ".join(f'"{n}"' for n in names)
+            rows = [[doc_id, source] + [columns[n][i] for n in columns] for i in range(n_rows)]
+            self.conn.execute(f'DELETE FROM "{table}" WHERE "_doc_id" = ?', (doc_id,))
+            self.conn.executemany(f'INSERT INTO "{table}" ({quoted}) VALUES ({placeholders})', rows)
+            self.conn.commit()
+            self._values_cache.pop(table, None)
+        print(f"[Analytics] Stored {n_rows} rows from {doc_id} in {table}")
+        return n_rows
+
+    def retain(self, source: str, doc_ids) -> int:
+        """Delete rows of `source` whose document is not in `doc_ids` (removed
+        from Mongo), plus rows stored before sources were recorded; returns rows deleted"""
+        deleted = 0
+        with self.lock:
+            self._refresh_caches()
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS _keep (doc_id TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM _keep")
+            self.conn.executemany("INSERT OR IGNORE INTO _keep VALUES (?)", ((str(d),) for d in doc_ids))
+            for table in self.tables():
+                if "_source" not in self._columns(table):
+                    continue
+                removed = self.conn.execute(
+                    f'DELETE FROM "{table}" WHERE ("_source" = ? OR "_source" IS NULL) '
+                    f'AND "_doc_id" NOT IN (SELECT doc_id FROM _keep)', (source,)
+                ).rowcount
+                if removed:
+                    self._values_cache.pop(table, None)
+                    print(f"[Analytics] Removed {removed} rows of deleted {source} documents from {table}")
+                deleted += removed
+            self.conn.execute("DELETE FROM _keep")
+            self.conn.commit()
+        return deleted
+
+    # --- querying ---
+    def _text_values(self, table) -> Dict[str, List[str]]:
+        # Distinct values of low-cardinality text columns, for matching query words
+        if table not in self._values_cache:
+            values = {}
+            for name, kind in self._columns(table).items():
+                if kind != "TEXT" or name.startswith("_"):
+                    continue
+                rows = self.conn.execute(f'SELECT DISTINCT "{name}" FROM "{table}" LIMIT 201').fetchall()
+                if len(rows) <= 200:
+                    values[name] = [r[0] for r in rows if r[0]]
+            self._values_cache[table] = values
+        return self._values_cache[table]
+
+    def _pick_table(self, q) -> Optional[str]:
+        tables = self.tables()
+        best, best_score = None, 0
+        for table in tables:
+            domain = table[:-len("_rows")]
+            score = sum(hint in q for hint in DOMAIN_HINTS.get(domain, ()))
+            score += sum(name.replace("_", " ") in q for name in self._columns(table) if not name.startswith("_"))
+            if score > best_score:
+                best, best_score = table, score
+        return best
+
+    @staticmethod
+    def _group_column(word: str, schema: Dict[str, str], measure: Optional[str]) -> Optional[str]:
+        # "region" -> region, "products" -> product_name (names read better than ids)
+        wanted = _singular(_column_name(word).split("_")[0])
+        candidates = [n for n in schema if not n.startswith("_") and n != measure
+                      and (n == wanted or n.startswith(wanted + "_"))]
+        candidates.sort(key=lambda n: (n != wanted and not n.endswith("_name"), n.endswith("_id")))
+        return candidates[0] if candidates else None
+
+    def plan(self, query: str) -> Optional[Dict[str, Any]]:
+        """Translate an aggregate question into SQL, or None if it is not one.
+
+        Needs an aggregate word and, except for counts, a numeric measure
+        named in the question ("total amount", "average sales"); vague
+        questions ("top fraud risks", "fraud overall") are left to retrieval.
+        """
+        self._refresh_caches()
+        q = " ".join(query.lower().split())
+        aggregate = next((agg for agg, pattern in AGGREGATES if pattern.search(q)), None)
+        ranking = RANKING_RE.search(q)
+        if aggregate is None and ranking is None:
+            return None
+        with self.lock:
+            table = self._pick_table(q)
+            if table is None:
+                return None
+            schema = self._columns(table)
+            numeric = [n for n, kind in schema.items() if kind == "REAL"]
+            measure = next((n for n in numeric if re.search(r"\b" + re.escape(n.replace("_", " ")) + r"\b", q)), None)
+            if measure is None:
+                measure = next((n for n in numeric if any(
+                    re.search(rf"\b{w}\b", q) for w in MEASURE_WORDS.get(n, ())
+                )), None)
+            if aggregate not in (None, "COUNT") and measure is None:
+                return None
+
+            group_by, which = None, False
+            for pattern, word in ((GROUP_BY_RE, 1), (WHICH_RE, 1), (RANKING_RE, 3)):
+                match = pattern.search(q)
+                if group_by is None and match:
+                    group_by = self._group_column(match.group(word), schema, measure)
+                    which = group_by is not None and pattern is WHICH_RE
+            if aggregate is None and group_by is None:
+                return None
+
+            # Over a group, superlatives and rankings order the group totals:
+            # "which region has the highest sales" keeps the first one,
+            # "top 5 products by sales" the first five
+            rank, limit = None, RANKING_LIMIT
+            if group_by and (aggregate in ("MAX", "MIN", None) or which):
+                superlative = aggregate in ("MAX", "MIN")
+                if aggregate in ("MAX", "MIN", None):
+                    aggregate = "SUM" if measure else "COUNT"
+                rank = "lowest" if LOWEST_RE.search(q) else "highest"
+                if ranking and ranking.group(2):
+                    limit = int(ranking.group(2))
+                elif superlative or which:
+                    limit = 1
+
+            where, params = [], []
+            for column, values in self._text_values(table).items():
+                for value in values:
+                    text = str(value).lower()
+                    # "transfers" matches TRANSFER
+                    if len(text) > 1 and re.search(r"\b" + re.escape(text.replace("_", " ")) + r"s?\b", q.replace("_", " ")):
+                        where.append(f'"{column}" = ?')
+                        params.append(value)
+                        break
+            comparison = COMPARISON_RE.search(q)
+            if comparison:
+                # Counts have no measure: "CASH_OUT transactions over $100k" compares the amount
+                target = measure or next((n for n in ("amount", "sales") if n in numeric), None)
+                if target is None and len(numeric) == 1:
+                    target = numeric[0]
+                if target is None:
+                    return None
+                amount = _number(comparison.group(2))
+                amount *= {"k": 1e3, "m": 1e6}.get(comparison.group(3) or "", 1)
+                where.append(f'"{target}" {COMPARISON_OPS[comparison.group(1)]} ?')
+                params.append(amount)
+
+        expression = "COUNT(*)" if aggregate == "COUNT" else f'{aggregate}("{measure}")'
+        sql = f'SELECT {expression} FROM "{table}"'
+        if group_by:
+            sql = f'SELECT "{group_by}", {expression} FROM "{table}"'
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if group_by:
+            sql += f' GROUP BY "{group_by}" ORDER BY 2 {"ASC" if rank == "lowest" else "DESC"} LIMIT {limit}'
+        return {"table": table, "aggregate": aggregate, "measure": measure, "group_by": group_by,
+                "rank": rank, "sql": sql, "params": params}
+
+    def answer(self, query: str) -> Optional[Dict[str, Any]]:
+        """Run the aggregate for `query`; returns the plan, rows and a summary"""
+        try:
+            plan = self.plan(query)
+            if plan is None:
+                return None
+            with self.lock:
+                rows = self.conn.execute(plan["sql"], plan["params"]).fetchall()
+        except sqlite3.Error as e:
+            print(f"[Analytics] Query failed: {e}")
+            return None
+        if not rows or rows[0][-1] is None:
+            return None
+        plan["rows"] = [list(r) for r in rows]
+        plan["summary"] = self._summarize(plan)
+        print(f"[Analytics] {plan['sql']} {plan['params']} -> {plan['rows'][:3]}")
+        return plan
+
+    def key_metrics(self, domain: str) -> Dict[str, Any]:
+        """Row count plus sum/avg/max of each numeric column of a domain table"""
+        table = f"{domain}_rows"
+        with self.lock:
+            self._refresh_caches()
+            if table not in self.tables():
+                return {}
+            numeric = [n for n, kind in self._columns(table).items() if kind == "REAL"]
+            selects = ["COUNT(*)"] + [f'{agg}("{n}")' for n in numeric for agg in ("SUM", "AVG", "MAX")]
+            row = self.conn.execute(f'SELECT {", ".join(selects)} FROM "{table}"').fetchone()
+        metrics = {"rows": row[0]}
+        for i, name in enumerate(numeric):
+            values = row[1 + 3 * i:4 + 3 * i]
+            for prefix, value in zip(("total", "avg", "max"), values):
+                metrics[f"{prefix}_{name}"] = round(value, 2) if isinstance(value, float) else value
+        return metrics
+
+    @staticmethod
+    def _summarize(plan) -> str:
+        label = {"COUNT": "Count", "SUM": "Total", "AVG": "Average", "MAX": "Maximum", "MIN": "Minimum"}[plan["aggregate"]]
+        subject = "rows" if plan["aggregate"] == "COUNT" else plan["measure"].replace("_", " ")
+        conditions = ""
+        if plan["params"]:
+            parts = plan["sql"].split(" WHERE ", 1)[1].split(" GROUP BY ")[0].replace('"', "").split(" AND ")
+            conditions = " where " + ", ".join(p.replace("?", repr(v)) for p, v in zip(parts, plan["params"]))
+
+        def fmt(value):
+            return f"{value:,.2f}" if isinstance(value, float) else f"{value:,}"
+
+        group = plan["group_by"].replace("_", " ") if plan["group_by"] else None
+        if group and plan.get("rank") and len(plan["rows"]) == 1:
+            key, value = plan["rows"][0]
+            if plan["aggregate"] == "COUNT":
+                extreme = "most rows" if plan["rank"] == "highest" else "fewest rows"
+            else:
+                extreme = f"{plan['rank']} {label.lower()} {subject}"
+            return f"{group.capitalize()} with the {extreme}{conditions} ({plan['table']}): {key} ({fmt(value)})"
+        if group:
+            lines = [f"{label} {subject} by {group}{conditions} ({plan['table']}):"]
+            lines += [f"- {key}: {fmt(value)}" for key, value in plan["rows"]]
+            return "\n".join(lines)
+        return f"{label} {subject}{conditions} ({plan['table']}): {fmt(plan['rows'][0][0])}"
+
+
+_stores: Dict[str, AnalyticsStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_analytics_store(tenant: Optional[str] = None) -> AnalyticsStore:
+    """The analytics store of `tenant` (default: the current request's tenant)"""
+    tenant = tenant or current_tenant.get()
+    with _stores_lock:
+        if tenant not in _stores:
+            _stores[tenant] = AnalyticsStore(tenant_path(ANALYTICS_DB_PATH, tenant))
+        return _stores[tenant]
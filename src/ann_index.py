@@ -0,0 +1,264 @@
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# --- CONFIGURATION ---
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # 0 = about sqrt(n) lists
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+
+
+class ANNIndex:
+    """Approximate candidate generator keyed by string vector ids.
+
+    Vectors are expected to be L2-normalized, so inner product is cosine.
+    `candidates` returns ids worth scoring exactly; the caller re-ranks them.
+    """
+
+    kind = "base"
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.labels: Dict[str, int] = {}
+        self.ids_by_label: Dict[int, str] = {}
+        self.next_label = 0
+
+    def _label(self, vid):
+        label = self.labels.get(vid)
+        if label is None:
+            label = self.next_label
+            self.labels[vid] = label
+            self.ids_by_label[label] = vid
+            self.next_label += 1
+        return label
+
+    def _forget(self, vid):
+        label = self.labels.pop(vid, None)
+        if label is not None:
+            self.ids_by_label.pop(label, None)
+        return label
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        raise NotImplementedError
+
+    def remove(self, ids: Sequence[str]):
+        raise NotImplementedError
+
+    def candidates(self, query: np.ndarray, k: int) -> Optional[List[str]]:
+        """Ids to re-rank, or None when the index cannot narrow the search yet"""
+        raise NotImplementedError
+
+    def __len__(self):
+        return len(self.labels)
+
+    def save(self, path: str):
+        raise NotImplementedError
+
+    def load(self, path: str) -> bool:
+        raise NotImplementedError
+
+    def _save_labels(self, path, extra=None):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"labels": self.labels, "next_label": self.next_label, **(extra or {})}, f)
+        os.replace(tmp, path)
+
+    def _load_labels(self, path):
+        with open(path, "r") as f:
+            state = json.load(f)
+        self.labels = state["labels"]
+        self.ids_by_label = {label: vid for vid, label in self.labels.items()}
+        self.next_label = state["next_label"]
+        return state
+
+
+class HNSWIndex(ANNIndex):
+    """HNSW graph through hnswlib, with in-place updates and soft deletes"""
+
+    kind = "hnsw"
+
+    def __init__(self, dimension: int, m: int = HNSW_M, ef_construction: int = HNSW_EF_CONSTRUCTION,
+                 ef_search: int = HNSW_EF_SEARCH, capacity: int = 1024):
+        super().__init__(dimension)
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("LOCAL_INDEX_ANN=hnsw requires hnswlib (pip install hnswlib)") from e
+        self._hnswlib = hnswlib
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index = self._new_index(capacity)
+
+    def _new_index(self, capacity):
+        index = self._hnswlib.Index(space="ip", dim=self.dimension)
+        index.init_index(max_elements=capacity, ef_construction=self.ef_construction, M=self.m)
+        index.set_ef(self.ef_search)
+        return index
+
+    def add(self, ids, vectors):
+        if not len(ids):
+            return
+        # Existing ids keep their label and add_items updates them in place;
+        # removed ids were forgotten, so re-adding them gets a fresh label
+        labels = [self._label(vid) for vid in ids]
+        needed = self.next_label
+        if needed > self.index.get_max_elements():
+            self.index.resize_index(max(needed, 2 * self.index.get_max_elements()))
+        self.index.add_items(np.asarray(vectors, dtype=np.float32), np.asarray(labels))
+
+    def remove(self, ids):
+        for vid in ids:
+            label = self._forget(vid)
+            if label is not None:
+                self.index.mark_deleted(label)
+
+    def candidates(self, query, k):
+        if not self.labels:
+            return []
+        k = min(k, len(self.labels))
+        self.index.set_ef(max(self.ef_search, k))
+        found, _ = self.index.knn_query(np.asarray([query], dtype=np.float32), k=k)
+        return [self.ids_by_label[label] for label in found[0] if label in self.ids_by_label]
+
+    def save(self, path):
+        self.index.save_index(path + ".bin")
+        self._save_labels(path + ".json")
+
+    def load(self, path):
+        if not (os.path.exists(path + ".bin") and os.path.exists(path + ".json")):
+            return False
+        self._load_labels(path + ".json")
+        self.index = self._hnswlib.Index(space="ip", dim=self.dimension)
+        self.index.load_index(path + ".bin", max_elements=max(1024, self.next_label))
+        self.index.set_ef(self.ef_search)
+        return True
+
+
+class IVFIndex(ANNIndex):
+    """Inverted-file index: k-means coarse quantizer, probe `nprobe` lists.
+
+    Pure numpy, so it needs no extra dependency. Until enough vectors exist
+    to train the centroids, `candidates` returns None (exact scan). The
+    quantizer is retrained when the index has grown 4x since training.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, dimension: int, nlist: int = IVF_NLIST, nprobe: int = IVF_NPROBE):
+        super().__init__(dimension)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = None
+        self.assignment: Dict[str, int] = {}
+        self.lists: Dict[int, set] = {}
+        self.trained_size = 0
+
+    def _target_nlist(self, n):
+        return self.nlist or max(1, int(np.sqrt(n)))
+
+    def train(self, vectors: np.ndarray, iterations: int = 10, seed: int = 0):
+        nlist = self._target_nlist(len(vectors))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), size=min(len(vectors), nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[nearest == c]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+        self.centroids = centroids.astype(np.float32)
+        self.trained_size = len(vectors)
+        print(f"Trained IVF quantizer with {nlist} lists on {len(sample)} vectors")
+
+    def _assign(self, vectors):
+        return np.argmax(np.asarray(vectors, dtype=np.float32) @ self.centroids.T, axis=1)
+
+    def needs_training(self, n):
+        # 39 points per centroid is the usual minimum for a stable k-means
+        if n < 39 * self._target_nlist(n) or n < 1000:
+            return False
+        return self.centroids is None or n >= 4 * self.trained_size
+
+    def add(self, ids, vectors):
+        for vid in ids:
+            self._label(vid)
+        if self.centroids is not None and len(ids):
+            for vid, c in zip(ids, self._assign(vectors)):
+                self._place(vid, int(c))
+
+    def _place(self, vid, c):
+        previous = self.assignment.get(vid)
+        if previous is not None:
+            self.lists[previous].discard(vid)
+        self.assignment[vid] = c
+        self.lists.setdefault(c, set()).add(vid)
+
+    def rebuild(self, ids, vectors):
+        """Retrain the quantizer on all vectors and reassign every id"""
+        self.train(vectors)
+        self.labels, self.ids_by_label, self.next_label = {}, {}, 0
+        self.assignment, self.lists = {}, {}
+        for vid in ids:
+            self._label(vid)
+        for start in range(0, len(ids), 65536):
+            block = self._assign(vectors[start:start + 65536])
+            for vid, c in zip(ids[start:start + 65536], block):
+                self._place(vid, int(c))
+
+    def remove(self, ids):
+        for vid in ids:
+            self._forget(vid)
+            c = self.assignment.pop(vid, None)
+            if c is not None:
+                self.lists[c].discard(vid)
+
+    def candidates(self, query, k):
+        if self.centroids is None:
+            return None
+        probes = np.argsort(-(self.centroids @ query))[:self.nprobe]
+        found = []
+        for c in probes:
+            found.extend(self.lists.get(int(c), ()))
+        return found
+
+    def save(self, path):
+        if self.centroids is not None:
+            tmp = path + ".npy.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, self.centroids)
+            os.replace(tmp, path + ".npy")
+        self._save_labels(path + ".json", {"assignment": self.assignment, "trained_size": self.trained_size})
+
+    def load(self, path):
+        if not os.path.exists(path + ".json"):
+            return False
+        state = self._load_labels(path + ".json")
+        self.assignment, self.lists = {}, {}
+        for vid, c in state.get("assignment", {}).items():
+            self._place(vid, c)
+        self.trained_size = state.get("trained_size", 0)
+        if os.path.exists(path + ".npy"):
+            self.centroids = np.load(path + ".npy")
+        return True
+
+
+ANN_INDEXES = {
+    "hnsw": HNSWIndex,
+    "ivf": IVFIndex,
+}
+
+
+def create_ann_index(kind: str, dimension: int) -> Optional[ANNIndex]:
+    """Return an ANN index for `kind`, or None for exact search"""
+    if not kind or kind == "none":
+        return None
+    if kind not in ANN_INDEXES:
+        raise ValueError(f"Unknown ANN index '{kind}'. Choose from: none, {', '.join(ANN_INDEXES)}")
+    return ANN_INDEXES[kind](dimension)
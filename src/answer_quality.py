@@ -0,0 +1,130 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+import yaml
+
+from src.embedders import EMBEDDING_BACKEND
+
+UNCERTAINTY_CONFIG_PATH = os.getenv(
+    "UNCERTAINTY_CONFIG_PATH", os.path.join(os.path.dirname(__file__), "config", "uncertainty.yaml")
+)
+
+DEFAULTS = {
+    "patterns": ["I don't know", "I'm not sure", "I don't have access"],
+    "retrieval_score_low": 0.70,
+    "retrieval_score_high": 0.85,
+    "unknown_retrieval_risk": 0.5,
+    "pre_generation_threshold": 0.9,
+    "pattern_weight": 0.4,
+    "retrieval_weight": 0.6,
+    "fallback_threshold": 0.5,
+}
+
+
+def _trie_regex(phrases: List[str]) -> str:
+    """One regex for many phrases, factored by common prefix so each text
+    position is tested against a single branch instead of every phrase"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+# LLMs often answer with typographic apostrophes; config phrases use straight ones
+APOSTROPHES = str.maketrans({"\u2019": "'", "\u2018": "'"})
+
+
+class UncertaintyMatcher:
+    """All uncertainty phrases compiled into one regex, matched in a single pass"""
+
+    def __init__(self, patterns: List[str]):
+        phrases = sorted({p.strip().lower() for p in patterns if p and p.strip()})
+        self._regex = re.compile(_trie_regex(phrases)) if phrases else None
+
+    def search(self, text: str) -> Optional[str]:
+        if not self._regex or not text:
+            return None
+        match = self._regex.search(text.lower().translate(APOSTROPHES))
+        return match.group(0) if match else None
+
+
+class FallbackGate:
+    """Scored "needs fallback" decision from retrieval scores and the answer text.
+
+    `retrieval_risk` runs before generation so weak retrieval can trigger the
+    web search up front; `decide` combines it with the uncertainty matcher
+    after generation. Every decision is logged as one JSON line so the
+    thresholds in uncertainty.yaml can be tuned from the logs. Similarity
+    scores are only comparable within one embedding model, so the retrieval
+    score range is taken from `retrieval_scores[backend]` when configured.
+    """
+
+    def __init__(self, config: Optional[Dict] = None, backend: str = EMBEDDING_BACKEND):
+        self.config = {**DEFAULTS, **(config or {})}
+        calibrated = (self.config.get("retrieval_scores") or {}).get(backend) or {}
+        self.score_low = float(calibrated.get("low", self.config["retrieval_score_low"]))
+        self.score_high = float(calibrated.get("high", self.config["retrieval_score_high"]))
+        if self.score_high <= self.score_low:
+            raise ValueError(f"retrieval score range for {backend} must have high > low")
+        self.matcher = UncertaintyMatcher(self.config["patterns"])
+        self.counts = {"pre_generation": 0, "post_generation": 0, "decisions": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_yaml(cls, path: str = UNCERTAINTY_CONFIG_PATH, backend: str = EMBEDDING_BACKEND):
+        try:
+            with open(path, "r") as f:
+                return cls(yaml.safe_load(f), backend)
+        except Exception as e:
+            print(f"Warning: Could not load uncertainty config {path}: {e}")
+            return cls(backend=backend)
+
+    def retrieval_risk(self, sources: Optional[List[Dict]], retrieved: bool = True) -> float:
+        """0 (strong matches) .. 1 (nothing relevant found)"""
+        if not retrieved:
+            return self.config["unknown_retrieval_risk"]
+        if not sources:
+            return 1.0
+        top = max(s.get("score") or 0.0 for s in sources)
+        low, high = self.score_low, self.score_high
+        return min(1.0, max(0.0, (high - top) / (high - low)))
+
+    def search_first(self, risk: float, query: str) -> bool:
+        """Whether to fetch web results before generating at all"""
+        decision = risk >= self.config["pre_generation_threshold"]
+        self._log("pre_generation", query, {"retrieval_risk": round(risk, 3)}, decision)
+        return decision
+
+    def decide(self, response: str, risk: float, query: str) -> bool:
+        """Whether the generated answer needs the web fallback and a second round"""
+        phrase = self.matcher.search(response)
+        score = self.config["pattern_weight"] * bool(phrase) + self.config["retrieval_weight"] * risk
+        decision = score >= self.config["fallback_threshold"]
+        self._log("post_generation", query,
+                  {"pattern": phrase, "retrieval_risk": round(risk, 3), "score": round(score, 3)}, decision)
+        return decision
+
+    def _log(self, stage, query, signals, decision):
+        with self._lock:
+            self.counts["decisions"] += 1
+            if decision:
+                self.counts[stage] += 1
+        print(f"[Quality] {json.dumps({'stage': stage, 'query': query[:80], **signals, 'fallback': decision})}")
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts)
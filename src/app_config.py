@@ -0,0 +1,250 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+import yaml
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationError, field_validator, model_validator
+
+from src.admission import (
+    ADMISSION_MAX_WAIT_SECONDS, EMBED_MAX_CONCURRENCY, LLM_MAX_CONCURRENCY, RATE_LIMIT_BURST, RATE_LIMIT_PER_MINUTE
+)
+from src.degradation import ANSWER_CACHE_MIN_SIMILARITY, ANSWER_CACHE_SIZE
+from src.model_router import LLM_MOCK, MODEL_CONFIG_PATH
+from src.reranker import RERANK_BUDGET_MS, RERANK_CANDIDATES
+from src.web_search import WEB_CACHE_STALE_SECONDS, WEB_CACHE_TTL_SECONDS
+
+CONFIG_DIR = os.getenv("CONFIG_DIR", os.path.join(os.path.dirname(__file__), "config"))
+RUNTIME_CONFIG_PATH = os.getenv("RUNTIME_CONFIG_PATH", os.path.join(CONFIG_DIR, "runtime.yaml"))
+# How often the config files are checked for changes; 0 disables hot reload
+CONFIG_RELOAD_SECONDS = float(os.getenv("CONFIG_RELOAD_SECONDS", "5"))
+# Startup defaults of the runtime settings; runtime.yaml overrides them
+PREFERENCES_CACHE_SECONDS = float(os.getenv("PREFERENCES_CACHE_SECONDS", "10"))
+SYNC_INTERVAL_MINUTES = float(os.getenv("SYNC_INTERVAL_MINUTES", "10000"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+
+CHAT_TASK = "chat_response"
+
+
+class ConfigError(Exception):
+    """Raised when the configuration files are missing or invalid"""
+
+
+class AgentConfig(BaseModel):
+    model_config = ConfigDict(extra="allow")  # other CrewAI agent options pass through
+
+    role: str = Field(min_length=1)
+    goal: str = Field(min_length=1)
+    backstory: str = Field(min_length=1)
+    verbose: bool = False
+    memory: bool = False
+    allow_delegation: bool = False
+    tools: List[str] = []
+
+
+class TaskConfig(BaseModel):
+    description_template: str = Field(min_length=1)
+    expected_output: str = Field(min_length=1)
+    agent: str
+
+    @field_validator("description_template")
+    @classmethod
+    def _template(cls, value):
+        if "{relevant_data}" not in value:
+            raise ValueError("must contain the {relevant_data} placeholder")
+        try:
+            value.format(relevant_data="")
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"is not a valid template (escape literal braces as {{{{ }}}}): {e}")
+        return value
+
+
+class ModelTier(BaseModel):
+    model: str = Field(min_length=1)
+    max_tokens: int = Field(gt=0)
+    temperature: float = Field(ge=0, le=2)
+    timeout: float = Field(gt=0)
+    fallback: Optional[str] = None
+
+
+class ModelsConfig(BaseModel):
+    tiers: Dict[str, ModelTier] = Field(min_length=1)
+    routes: Dict[str, str] = {}
+    long_context_chars: Optional[int] = Field(None, gt=0)
+    long_context_tier: Optional[str] = None
+    default_tier: str = "standard"
+
+    @model_validator(mode="after")
+    def _tier_references(self):
+        references = [("default_tier", self.default_tier), ("long_context_tier", self.long_context_tier)]
+        references += [(f"routes.{intent}", tier) for intent, tier in self.routes.items()]
+        references += [(f"tiers.{name}.fallback", t.fallback) for name, t in self.tiers.items()]
+        unknown = [f"{where} -> {tier}" for where, tier in references if tier and tier not in self.tiers]
+        if unknown:
+            raise ValueError(f"unknown tiers referenced: {', '.join(unknown)}")
+        if LLM_MOCK and "mock" not in self.tiers:
+            raise ValueError("LLM_MOCK=true needs a 'mock' tier (model: mock)")
+        return self
+
+
+class RetrievalSettings(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    top_k: int = Field(RETRIEVAL_TOP_K, ge=1, le=20)
+    rerank_candidates: int = Field(RERANK_CANDIDATES, ge=1, le=200)
+    rerank_budget_ms: float = Field(RERANK_BUDGET_MS, ge=0)
+
+
+class CacheSettings(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    answer_cache_size: int = Field(ANSWER_CACHE_SIZE, ge=0)
+    answer_cache_min_similarity: float = Field(ANSWER_CACHE_MIN_SIMILARITY, ge=0, le=1)
+    web_cache_ttl_seconds: float = Field(WEB_CACHE_TTL_SECONDS, ge=0)
+    web_cache_stale_seconds: float = Field(WEB_CACHE_STALE_SECONDS, ge=0)
+    preferences_cache_seconds: float = Field(PREFERENCES_CACHE_SECONDS, ge=0)
+
+
+class SyncSettings(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    interval_minutes: float = Field(SYNC_INTERVAL_MINUTES, gt=0)
+
+
+class AdmissionSettings(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    llm_max_concurrency: int = Field(LLM_MAX_CONCURRENCY, ge=1)
+    embed_max_concurrency: int = Field(EMBED_MAX_CONCURRENCY, ge=1)
+    max_wait_seconds: float = Field(ADMISSION_MAX_WAIT_SECONDS, gt=0)
+    rate_limit_per_minute: float = Field(RATE_LIMIT_PER_MINUTE, ge=0)
+    rate_limit_burst: int = Field(RATE_LIMIT_BURST, ge=1)
+
+
+class RuntimeSettings(BaseModel):
+    """Performance knobs from runtime.yaml; unknown keys are rejected so typos surface"""
+
+    model_config = ConfigDict(extra="forbid")
+
+    retrieval: RetrievalSettings = RetrievalSettings()
+    caches: CacheSettings = CacheSettings()
+    sync: SyncSettings = SyncSettings()
+    admission: AdmissionSettings = AdmissionSettings()
+
+
+class AppConfig(BaseModel):
+    """Everything the chat service reads from src/config, validated together"""
+
+    agents: Dict[str, AgentConfig] = Field(min_length=1)
+    tasks: Dict[str, TaskConfig] = Field(min_length=1)
+    models: ModelsConfig
+    runtime: RuntimeSettings = RuntimeSettings()
+
+    _prompt_head: str = PrivateAttr("")
+    _prompt_tail: str = PrivateAttr("")
+
+    @model_validator(mode="after")
+    def _task_agents(self):
+        if CHAT_TASK not in self.tasks:
+            raise ValueError(f"tasks.yaml must define the '{CHAT_TASK}' task")
+        missing = [f"{name} -> {task.agent}" for name, task in self.tasks.items() if task.agent not in self.agents]
+        if missing:
+            raise ValueError(f"tasks reference agents missing from agents.yaml: {', '.join(missing)}")
+        return self
+
+    def model_post_init(self, __context):
+        # The fixed parts of the system prompt, joined once instead of per request
+        agent = self.chat_agent
+        self._prompt_head = (
+            f"\nROLE: {agent.role}\nGOAL: {agent.goal}\nBACKSTORY: {agent.backstory}\n\nTASK DESCRIPTION:\n"
+        )
+        self._prompt_tail = f"\n\nEXPECTED OUTPUT: {self.chat_task.expected_output}\n"
+
+    @property
+    def chat_task(self) -> TaskConfig:
+        return self.tasks[CHAT_TASK]
+
+    @property
+    def chat_agent(self) -> AgentConfig:
+        return self.agents[self.chat_task.agent]
+
+    def system_prompt(self, relevant_data: str) -> str:
+        return self._prompt_head + self.chat_task.description_template.format(relevant_data=relevant_data) + self._prompt_tail
+
+
+def config_paths() -> Dict[str, str]:
+    return {
+        "agents": os.path.join(CONFIG_DIR, "agents.yaml"),
+        "tasks": os.path.join(CONFIG_DIR, "tasks.yaml"),
+        "models": MODEL_CONFIG_PATH,
+        "runtime": RUNTIME_CONFIG_PATH,
+    }
+
+
+def load_config() -> AppConfig:
+    """Parse and validate every config file; raises ConfigError listing all problems"""
+    raw, errors = {}, []
+    for section, path in config_paths().items():
+        try:
+            with open(path, "r") as f:
+                raw[section] = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            if section != "runtime":  # runtime.yaml is optional
+                errors.append(f"{path}: file not found")
+        except yaml.YAMLError as e:
+            errors.append(f"{path}: invalid YAML: {e}")
+    if errors:
+        raise ConfigError("\n".join(errors))
+    try:
+        return AppConfig(**raw)
+    except ValidationError as e:
+        raise ConfigError("\n".join(
+            f"{'.'.join(str(part) for part in err['loc']) or 'config'}: {err['msg']}" for err in e.errors()
+        ))
+
+
+class ConfigStore:
+    """The current AppConfig, replaced atomically when the files change.
+
+    `reload_if_changed()` re-validates after any config file's mtime moves;
+    an invalid edit is reported and the previous config keeps serving.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mtimes = self._stat()
+        self.current = load_config()
+        self.reloads = 0
+        self.rejected = 0
+        self.last_error = None
+
+    def _stat(self):
+        mtimes = {}
+        for path in config_paths().values():
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def reload_if_changed(self) -> Optional[AppConfig]:
+        """The new config if the files changed and validate, else None"""
+        with self._lock:
+            mtimes = self._stat()
+            if mtimes == self._mtimes:
+                return None
+            self._mtimes = mtimes
+            try:
+                config = load_config()
+            except ConfigError as e:
+                self.rejected += 1
+                self.last_error = str(e)
+                print(f"[Config] Ignoring invalid config change, keeping the current config:\n{e}")
+                return None
+            self.current = config
+            self.reloads += 1
+            self.last_error = None
+            print("[Config] Reloaded configuration")
+            return config
+
+    def stats(self):
+        return {"reloads": self.reloads, "rejected": self.rejected, "last_error": self.last_error}
@@ -0,0 +1,68 @@
+import hmac
+import os
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from src.tenants import validate_tenant
+
+# Comma-separated "key:client[:tenant]" entries. Only callers presenting one
+# of these keys (`Authorization: Bearer <key>` or API_KEY_HEADER) are
+# identified by client name, and only they can reach a tenant other than
+# the default one; everyone else is identified by their peer IP address
+API_KEYS = os.getenv("API_KEYS", "")
+API_KEY_HEADER = os.getenv("API_KEY_HEADER", "X-API-Key")
+
+
+class Unauthorized(Exception):
+    """Raised for a request presenting an API key that is not configured"""
+
+
+class Caller(NamedTuple):
+    client: str
+    authenticated: bool
+    tenant: Optional[str] = None  # the tenant the key is bound to, if any
+
+
+def parse_api_keys(spec: str) -> Dict[str, Tuple[str, Optional[str]]]:
+    """{key: (client, tenant or None)} from the API_KEYS format"""
+    keys = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        key, _, rest = entry.partition(":")
+        client, _, tenant = rest.partition(":")
+        if not key or not client.strip():
+            raise ValueError("API_KEYS entries must look like 'key:client' or 'key:client:tenant'")
+        # Fails at startup, not per request, for a key bound to an unknown tenant
+        keys[key] = (client.strip(), validate_tenant(tenant) if tenant.strip() else None)
+    return keys
+
+
+class Authenticator:
+    """Maps the API key a request presents to the client (and tenant) it was
+    issued to.
+
+    Rate limits, priority and tenancy are keyed on this identity, never on
+    values the caller can choose freely (like a client-id or tenant header).
+    """
+
+    def __init__(self, keys: Optional[Dict[str, Tuple[str, Optional[str]]]] = None):
+        self.keys = parse_api_keys(API_KEYS) if keys is None else keys
+
+    @staticmethod
+    def presented_key(headers) -> Optional[str]:
+        authorization = headers.get("Authorization") or ""
+        if authorization.lower().startswith("bearer "):
+            return authorization[7:].strip() or None
+        return headers.get(API_KEY_HEADER) or None
+
+    def authenticate(self, headers, peer: Optional[str]) -> Caller:
+        """The caller's identity; raises Unauthorized for an unknown key"""
+        key = self.presented_key(headers)
+        if key is None:
+            return Caller(f"ip:{peer or 'unknown'}", False)
+        for known, (client, tenant) in self.keys.items():
+            # Constant-time comparison so keys cannot be guessed byte by byte
+            if hmac.compare_digest(known.encode("utf-8"), key.encode("utf-8")):
+                return Caller(client, True, tenant)
+        raise Unauthorized("Invalid API key")
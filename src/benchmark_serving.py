@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark /chat throughput as the number of worker processes grows.
+
+For each worker count the app is started with the gunicorn profile
+(gunicorn.conf.py) on a scratch port with the offline mock LLM, loaded by
+concurrent clients, and stopped. Reports requests/s, latency percentiles and
+scaling efficiency relative to one worker. With --url an already running
+server is measured instead.
+
+Usage:
+    python -m src.benchmark_serving [--workers 1,2,4,8] [--clients 64] [--requests 2000]
+    python -m src.benchmark_serving --url http://127.0.0.1:8000 --clients 32
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+QUERIES = [
+    "Show me recent fraud patterns",
+    "What was total revenue in the West region?",
+    "Summarize the market SWOT analysis",
+    "Which transactions were flagged as CASH_OUT?",
+    "How is revenue forecast to change next quarter?",
+]
+
+
+def wait_ready(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/health", timeout=2).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def run_load(url, clients, total, unique):
+    """Fire `total` /chat requests from `clients` threads; returns (seconds, latencies, errors)"""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def client(n):
+        session = requests.Session()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            query = QUERIES[i % len(QUERIES)] + (f" (#{i})" if unique else "")
+            start = time.perf_counter()
+            try:
+                resp = session.post(f"{url}/chat", json={"query": query}, timeout=60)
+                ok = resp.status_code == 200
+            except requests.RequestException:
+                ok = False
+            with lock:
+                (latencies if ok else errors).append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, sorted(latencies), errors
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def report(label, elapsed, latencies, errors, baseline=None):
+    rps = len(latencies) / elapsed
+    line = (f"{label:>8} {rps:10.1f} req/s  p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  "
+            f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  errors {len(errors)}")
+    if baseline:
+        line += f"  scaling x{rps / baseline:.2f}"
+    print(line)
+    return rps
+
+
+def start_server(workers, port):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port),
+               LLM_MOCK=os.getenv("LLM_MOCK", "true"), RATE_LIMIT_PER_MINUTE="0")
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "src.main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/chat throughput vs worker count")
+    parser.add_argument("--workers", default=f"1,2,{os.cpu_count() or 4}")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="measure this running server instead of starting one")
+    parser.add_argument("--repeat-queries", action="store_true",
+                        help="send the same few queries (exercises the shared caches)")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'throughput':>16}")
+    if args.url:
+        report("-", *run_load(args.url.rstrip("/"), args.clients, args.requests, not args.repeat_queries))
+        return 0
+
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(",")]:
+        url = f"http://127.0.0.1:{args.port}"
+        server = start_server(workers, args.port)
+        try:
+            if not wait_ready(url):
+                print(f"{workers:>8} server did not become ready")
+                continue
+            run_load(url, workers, workers * 5, True)  # warm up every worker
+            rps = report(str(workers), *run_load(url, args.clients, args.requests, not args.repeat_queries),
+                         baseline=baseline)
+            baseline = baseline or rps
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,268 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from src.degradation import CircuitOpen
+
+# Sessions must be shared once several worker processes serve /chat
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+MEMORY_STORE = os.getenv("MEMORY_STORE", "mongo" if WEB_CONCURRENCY > 1 else "memory").lower()  # memory | mongo
+MEMORY_COLLECTION = os.getenv("MEMORY_COLLECTION", "Chat_Sessions")
+MEMORY_MAX_SESSIONS = int(os.getenv("MEMORY_MAX_SESSIONS", "1000"))
+MEMORY_MAX_TURNS = int(os.getenv("MEMORY_MAX_TURNS", "10"))
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "1500"))
+MEMORY_TTL_SECONDS = int(os.getenv("MEMORY_TTL_SECONDS", "86400"))
+MEMORY_SUMMARY_MODEL = os.getenv("MEMORY_SUMMARY_MODEL", "gpt-4o-mini")
+# Turns kept while a fold is pending or failing, so a session cannot grow unbounded
+MAX_UNFOLDED_TURNS_FACTOR = 3
+
+# Short questions leaning on the previous answer ("what about revenue?", "why is that?",
+# "is it growing?", "tell me more about those"). A pronoun elsewhere in a
+# self-contained question ("show me that fraud report") does not count.
+REFERENT = r"(it|that|this|those|these|they|them)"
+FOLLOW_UP_RE = re.compile(
+    r"^(and|but|also|what about|how about|what else|same for|tell me more|more on|more about)\b"
+    rf"|^(why|how|what|which|where|when|who)( (is|was|are|were|did|does|do|has|had|about))? {REFERENT}\b"
+    rf"|^(is|are|was|were|does|did|do|has|have|can|could|will|would) {REFERENT}\b"
+    rf"|^(which|what|how many|how much) of (them|those|these)\b"
+    rf"|\b(about|of|on|with|from|in|for|behind|explain|mean by) {REFERENT}\W*$"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text; close enough for budgeting
+    return len(text) // 4 + 1
+
+
+def is_follow_up(query: str) -> bool:
+    q = query.lower().strip()
+    return len(q.split()) <= 8 and bool(FOLLOW_UP_RE.search(q))
+
+
+def new_session() -> Dict:
+    return {"turns": [], "summary": "", "last_context": None, "folds": 0}
+
+
+def _copy(session: Dict) -> Dict:
+    return {**session, "turns": list(session["turns"])}
+
+
+class InMemorySessionStore:
+    """Process-local LRU of sessions with idle expiry"""
+
+    def __init__(self, max_sessions: int = MEMORY_MAX_SESSIONS, ttl: int = MEMORY_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, session_id: str) -> Optional[Dict]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if time.time() - entry["updated"] > self.ttl:
+            del self._sessions[session_id]
+            return None
+        return entry["session"]
+
+    def _touch(self, session_id: str, session: Dict):
+        self._sessions[session_id] = {"session": session, "updated": time.time()}
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            session = self._live(session_id)
+            if session is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            return _copy(session)
+
+    def append(self, session_id: str, turn: Dict, context: Optional[str], keep: int) -> Dict:
+        with self._lock:
+            session = self._live(session_id) or new_session()
+            session["turns"] = (session["turns"] + [turn])[-keep:]
+            if context:
+                session["last_context"] = context
+            self._touch(session_id, session)
+            return _copy(session)
+
+    def fold(self, session_id: str, turns: List[Dict], summary: str, folds: int) -> bool:
+        with self._lock:
+            session = self._live(session_id)
+            if session is None or session.get("folds", 0) != folds:
+                return False
+            session["turns"] = [t for t in session["turns"] if t not in turns]
+            session["summary"] = summary
+            session["folds"] = folds + 1
+            self._touch(session_id, session)
+            return True
+
+
+class MongoSessionStore:
+    """Sessions in a Mongo collection that a TTL index expires when idle.
+
+    Turns are appended with `$push`/`$slice` and folds are applied only if no
+    other fold landed since the session was read (`session.folds` counter), so
+    concurrent workers never overwrite each other's turns.
+    """
+
+    def __init__(self, db, collection: str = MEMORY_COLLECTION, ttl: int = MEMORY_TTL_SECONDS):
+        self.collection = db[collection]
+        try:
+            self.collection.create_index("updatedAt", expireAfterSeconds=ttl)
+            self.collection.create_index("session_id", unique=True)
+        except Exception as e:
+            print(f"[Memory] Could not create session indexes: {e}")
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        doc = self.collection.find_one({"session_id": session_id}, {"_id": 0, "session": 1})
+        return doc["session"] if doc else None
+
+    def append(self, session_id: str, turn: Dict, context: Optional[str], keep: int) -> Dict:
+        on_insert = {"session.summary": "", "session.folds": 0}
+        updates = {"updatedAt": datetime.now(timezone.utc)}
+        if context:
+            updates["session.last_context"] = context
+        else:
+            on_insert["session.last_context"] = None
+        doc = self.collection.find_one_and_update(
+            {"session_id": session_id},
+            {"$push": {"session.turns": {"$each": [turn], "$slice": -keep}},
+             "$set": updates, "$setOnInsert": on_insert},
+            projection={"_id": 0, "session": 1}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return doc["session"]
+
+    def fold(self, session_id: str, turns: List[Dict], summary: str, folds: int) -> bool:
+        result = self.collection.update_one(
+            # Sessions written before the counter existed match as 0
+            {"session_id": session_id, "session.folds": folds if folds else {"$in": [0, None]}},
+            {"$pull": {"session.turns": {"$in": turns}},
+             "$set": {"session.summary": summary, "updatedAt": datetime.now(timezone.utc)},
+             "$inc": {"session.folds": 1}}
+        )
+        return result.matched_count > 0
+
+
+class ConversationMemory:
+    """Session-scoped chat history: recent turns plus a rolling summary.
+
+    `record` only appends the turn. When a session holds more than
+    `max_turns` turns or exceeds the token budget, it returns True and the
+    caller runs `fold` off the request path: the oldest turns are folded into
+    a compact summary, so the history sent to the LLM stays bounded however
+    long the conversation runs. Until then `history_messages` sends only the
+    newest `max_turns`. The last retrieval context is kept so follow-up
+    questions can reuse it.
+    """
+
+    def __init__(self, store, max_turns: int = MEMORY_MAX_TURNS, token_budget: int = MEMORY_TOKEN_BUDGET,
+                 breaker=None):
+        self.store = store
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.breaker = breaker
+
+    def get(self, session_id: str) -> Dict:
+        try:
+            return self.store.get(session_id) or new_session()
+        except Exception as e:
+            print(f"[Memory] Could not load session {session_id}: {e}")
+            return new_session()
+
+    def history_messages(self, session: Dict) -> List[Dict[str, str]]:
+        """Chat messages (summary + recent turns) to place before the new query"""
+        messages = []
+        if session.get("summary"):
+            messages.append({"role": "system", "content": f"Summary of the conversation so far: {session['summary']}"})
+        for turn in session.get("turns", [])[-self.max_turns:]:
+            messages.append({"role": "user", "content": turn["user"]})
+            messages.append({"role": "assistant", "content": turn["assistant"]})
+        return messages
+
+    def reusable_context(self, session: Dict, query: str) -> Optional[str]:
+        """Previous retrieval context when `query` is a follow-up to it"""
+        if session.get("last_context") and session.get("turns") and is_follow_up(query):
+            return session["last_context"]
+        return None
+
+    def record(self, session_id: str, query: str, response: str, context: Optional[str] = None) -> bool:
+        """Append a turn; True when the session is over budget and should be folded"""
+        turn = {"user": query, "assistant": response, "at": time.time()}
+        try:
+            session = self.store.append(session_id, turn, context, self.max_turns * MAX_UNFOLDED_TURNS_FACTOR)
+        except Exception as e:
+            print(f"[Memory] Could not save session {session_id}: {e}")
+            return False
+        return bool(self._overflow(session))
+
+    def fold(self, session_id: str):
+        """Fold the turns over budget into the rolling summary (one LLM call)"""
+        session = self.get(session_id)
+        overflow = self._overflow(session)
+        if not overflow:
+            return
+        summary = self._summarize(session.get("summary", ""), overflow)
+        try:
+            if not self.store.fold(session_id, overflow, summary, session.get("folds", 0)):
+                print(f"[Memory] Session {session_id} was folded concurrently, keeping that summary")
+        except Exception as e:
+            print(f"[Memory] Could not save the summary of session {session_id}: {e}")
+
+    def _overflow(self, session: Dict) -> List[Dict]:
+        turns = list(session.get("turns", []))
+        summary = session.get("summary", "")
+        overflow = []
+        while len(turns) > self.max_turns or (len(turns) > 1 and self._tokens(summary, turns) > self.token_budget):
+            overflow.append(turns.pop(0))
+        return overflow
+
+    @staticmethod
+    def _tokens(summary: str, turns: List[Dict]) -> int:
+        return estimate_tokens(summary + "".join(t["user"] + t["assistant"] for t in turns))
+
+    def _summarize(self, summary: str, turns: List[Dict]) -> str:
+        transcript = "\n".join(f"User: {t['user']}\nAssistant: {t['assistant']}" for t in turns)
+        try:
+            # Shares the chat LLM's breaker: no summary calls while the provider is failing
+            if self.breaker is not None and not self.breaker.allow():
+                raise CircuitOpen("LLM circuit open, skipping the summary call")
+            from litellm import completion
+            try:
+                response = completion(
+                    model=MEMORY_SUMMARY_MODEL,
+                    messages=[{"role": "user", "content": (
+                        "Update the running summary of this conversation in at most 80 words, "
+                        "keeping names, figures and open questions.\n\n"
+                        f"CURRENT SUMMARY: {summary or '(none)'}\n\nNEW TURNS:\n{transcript}"
+                    )}],
+                    max_tokens=150,
+                    temperature=0.2
+                )
+            except Exception:
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                raise
+            if self.breaker is not None:
+                self.breaker.record_success()
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"[Memory] Rolling summary failed, truncating instead: {e}")
+            # Keep the tail, which holds the most recent facts
+            combined = f"{summary} {' '.join(t['user'] for t in turns)}".strip()
+            return combined[-self.token_budget:]
+
+
+def create_memory(db=None, breaker=None) -> ConversationMemory:
+    """Memory backed by MEMORY_STORE (in-process LRU, or Mongo with a TTL index)"""
+    if MEMORY_STORE == "mongo" and db is not None:
+        return ConversationMemory(MongoSessionStore(db), breaker=breaker)
+    return ConversationMemory(InMemorySessionStore(), breaker=breaker)
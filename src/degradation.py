@@ -0,0 +1,159 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import List, Optional, Sequence
+
+from src.shared_cache import SharedCache, cache_key
+from src.single_flight import normalize_query
+
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "500"))
+ANSWER_CACHE_MIN_SIMILARITY = float(os.getenv("ANSWER_CACHE_MIN_SIMILARITY", "0.92"))
+EXTRACTIVE_SENTENCES = int(os.getenv("EXTRACTIVE_SENTENCES", "3"))
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD_RE = re.compile(r"[a-z0-9_]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it me of on or show tell that the this to "
+    "was were what when where which who why with you your about give".split()
+)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency the breaker considers unhealthy"""
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency for a while.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    `allow()` is False for `reset_seconds`; then one trial call is let
+    through (half-open) and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                print(f"[Breaker] {self.name} recovered, closing")
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial:
+                    print(f"[Breaker] {self.name} unhealthy after {self.failures} failures, opening for {self.reset_seconds:g}s")
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+class AnswerCache:
+    """Last successful answers, looked up by query similarity when the LLM is down.
+
+    With a `shared` SharedCache, exact-query answers are also written there,
+    so a worker whose LLM calls fail can serve an answer another worker got.
+    """
+
+    def __init__(self, size: int = ANSWER_CACHE_SIZE, min_similarity: float = ANSWER_CACHE_MIN_SIMILARITY,
+                 shared: Optional[SharedCache] = None):
+        self.size = size
+        self.min_similarity = min_similarity
+        self.shared = shared
+        self._entries: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared_key(self, key: tuple) -> str:
+        return cache_key(json.dumps(key, default=str))
+
+    def put(self, query: str, vector: Optional[Sequence[float]], response: str, scope=None):
+        key = (normalize_query(query), scope)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = {"vector": _unit(vector), "response": response}
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        if self.shared is not None:
+            self.shared.put(self._shared_key(key), response.encode("utf-8"))
+
+    def lookup(self, query: str, vector: Optional[Sequence[float]] = None, scope=None) -> Optional[str]:
+        key = (normalize_query(query), scope)
+        with self._lock:
+            exact = self._entries.get(key)
+            if exact:
+                return exact["response"]
+            q = _unit(vector)
+            best, best_score = None, self.min_similarity
+            for (_, entry_scope), entry in self._entries.items():
+                if q is None or entry_scope != scope or entry["vector"] is None:
+                    continue
+                score = sum(a * b for a, b in zip(q, entry["vector"]))
+                if score >= best_score:
+                    best, best_score = entry["response"], score
+        if best is None and self.shared is not None:
+            shared = self.shared.get(self._shared_key(key))
+            best = shared.decode("utf-8") if shared is not None else None
+        return best
+
+
+def _unit(vector):
+    if vector is None:
+        return None
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def extractive_answer(query: str, passages: Sequence[str], max_sentences: int = EXTRACTIVE_SENTENCES) -> Optional[str]:
+    """Best-matching sentences from the retrieved passages, without an LLM.
+
+    Sentences are scored by the idf-weighted query terms they contain and
+    returned in their original order.
+    """
+    sentences = [s.strip() for p in passages for s in SENTENCE_RE.split(p or "") if len(s.strip()) > 20]
+    query_terms = set(_terms(query))
+    if not sentences or not query_terms:
+        return None
+    sentence_terms = [set(_terms(s)) for s in sentences]
+    df = Counter(t for terms in sentence_terms for t in terms & query_terms)
+    idf = {t: math.log(1 + len(sentences) / df[t]) for t in df}
+    scores = [sum(idf.get(t, 0.0) for t in terms & query_terms) for terms in sentence_terms]
+    ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])[:max_sentences]
+    if not ranked:
+        return None
+    return " ".join(sentences[i] for i in sorted(ranked))
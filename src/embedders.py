@@ -0,0 +1,146 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- CONFIGURATION ---
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()  # openai | huggingface | local
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "0"))  # 0 = backend default
+LOCAL_EMBEDDING_THREADS = int(os.getenv("LOCAL_EMBEDDING_THREADS", str(min(4, os.cpu_count() or 1))))
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+LOCAL_EMBEDDING_ONNX_FILE = os.getenv("LOCAL_EMBEDDING_ONNX_FILE")  # e.g. onnx/model_qint8_avx512_vnni.onnx
+LOCAL_EMBEDDING_QUANTIZE = os.getenv("LOCAL_EMBEDDING_QUANTIZE", "true").lower() == "true"
+
+
+class Embedder:
+    """Turns texts into fixed-size vectors. Backends implement `embed_many`."""
+
+    name = "base"
+    dimension = 0
+
+    def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_many([text])[0]
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings through litellm (network, 1536-dim for ada-002)"""
+
+    name = "openai"
+
+    def __init__(self, model: Optional[str] = None, dimension: int = 0):
+        self.model = model or "text-embedding-ada-002"
+        self.dimension = dimension or 1536
+        self.api_key = os.getenv("OPENAI_API_KEY")
+
+    def embed_many(self, texts):
+        from litellm import embedding
+        result = embedding(model=self.model, input=list(texts), api_key=self.api_key)
+        return [item['embedding'] for item in sorted(result['data'], key=lambda d: d['index'])]
+
+
+class HuggingFaceEmbedder(Embedder):
+    """Hugging Face Inference API feature extraction (network)"""
+
+    name = "huggingface"
+
+    def __init__(self, model: Optional[str] = None, dimension: int = 0):
+        from huggingface_hub import InferenceClient
+        self.model = model or "intfloat/multilingual-e5-large"
+        self.dimension = dimension or 1024
+        self.client = InferenceClient(token=os.getenv("HF_TOKEN"))
+
+    def embed_many(self, texts):
+        vectors = []
+        for text in texts:
+            result = self.client.feature_extraction(text, model=self.model)
+            vector = result.tolist() if hasattr(result, "tolist") else result
+            # Some models return one vector per token; mean-pool those
+            if vector and isinstance(vector[0], list):
+                vector = [sum(col) / len(vector) for col in zip(*vector)]
+            vectors.append(vector)
+        return vectors
+
+
+class LocalEmbedder(Embedder):
+    """CPU embeddings with sentence-transformers, no network required.
+
+    Uses the ONNX Runtime backend when LOCAL_EMBEDDING_ONNX_FILE points at an
+    exported (ideally quantized) model file, otherwise PyTorch with dynamic
+    int8 quantization of the linear layers. Large inputs are split into
+    batches and encoded on a small thread pool.
+    """
+
+    name = "local"
+
+    def __init__(self, model: Optional[str] = None, dimension: int = 0):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=local requires sentence-transformers "
+                "(pip install sentence-transformers, plus optimum[onnxruntime] for ONNX)"
+            ) from e
+
+        self.model_name = model or "sentence-transformers/all-MiniLM-L6-v2"
+        if LOCAL_EMBEDDING_ONNX_FILE:
+            self.model = SentenceTransformer(
+                self.model_name, device="cpu", backend="onnx",
+                model_kwargs={"file_name": LOCAL_EMBEDDING_ONNX_FILE},
+            )
+        else:
+            self.model = SentenceTransformer(self.model_name, device="cpu")
+            if LOCAL_EMBEDDING_QUANTIZE:
+                self._quantize()
+        self.dimension = dimension or self.model.get_sentence_embedding_dimension()
+        self.batch_size = LOCAL_EMBEDDING_BATCH_SIZE
+        self.pool = ThreadPoolExecutor(max_workers=LOCAL_EMBEDDING_THREADS, thread_name_prefix="embed")
+        print(f"Loaded local embedding model {self.model_name} ({self.dimension}-dim)")
+
+    def _quantize(self):
+        try:
+            import torch
+            torch.set_num_threads(LOCAL_EMBEDDING_THREADS)
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        except Exception as e:
+            print(f"[Warning] Could not quantize local embedding model: {e}")
+
+    def _encode(self, texts):
+        return self.model.encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True,
+            convert_to_numpy=True, show_progress_bar=False,
+        ).tolist()
+
+    def embed_many(self, texts):
+        texts = list(texts)
+        if len(texts) <= self.batch_size:
+            return self._encode(texts)
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        vectors = []
+        for batch_vectors in self.pool.map(self._encode, batches):
+            vectors.extend(batch_vectors)
+        return vectors
+
+
+EMBEDDERS = {
+    "openai": OpenAIEmbedder,
+    "huggingface": HuggingFaceEmbedder,
+    "local": LocalEmbedder,
+}
+
+_embedder = None
+
+
+def get_embedder() -> Embedder:
+    """Return the process-wide embedder selected by EMBEDDING_BACKEND"""
+    global _embedder
+    if _embedder is None:
+        if EMBEDDING_BACKEND not in EMBEDDERS:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND '{EMBEDDING_BACKEND}'. Choose from: {', '.join(EMBEDDERS)}")
+        _embedder = EMBEDDERS[EMBEDDING_BACKEND](EMBEDDING_MODEL, EMBEDDING_DIM)
+    return _embedder
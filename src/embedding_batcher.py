@@ -0,0 +1,73 @@
+import asyncio
+import os
+from typing import Callable, List, Optional, Sequence
+
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+
+
+class EmbeddingBatcher:
+    """Micro-batch concurrent embedding requests into single provider calls.
+
+    Texts submitted within `window_ms` of the first pending one (or until
+    `max_batch` texts are queued) are sent together through `embed_many`,
+    which runs in a worker thread. Each caller gets back its own vector.
+    With a `limiter` (admission.PriorityLimiter) each provider call, not each
+    caller, takes one slot, so admission never caps the batch size.
+    """
+
+    def __init__(self, embed_many: Callable[[Sequence[str]], List[Optional[List[float]]]],
+                 window_ms: float = EMBED_BATCH_WINDOW_MS, max_batch: int = EMBED_BATCH_MAX_SIZE,
+                 limiter=None):
+        self.embed_many = embed_many
+        self.limiter = limiter
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.texts = 0
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Queue `text` for the next batch and wait for its vector"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        # Identical texts in one window are embedded once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        self.texts += len(batch)
+        try:
+            if self.limiter is not None:
+                vectors = await self.limiter.run_in_thread(self.embed_many, texts)
+            else:
+                vectors = await asyncio.to_thread(self.embed_many, texts)
+        except Exception as e:
+            print(f"Error in embedding batch: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        by_text = dict(zip(texts, vectors))
+        for text, future in batch:
+            # Callers that went away (cancelled) are simply skipped
+            if not future.done():
+                future.set_result(by_text.get(text))
+
+    def stats(self):
+        return {"batches": self.batches, "texts": self.texts}
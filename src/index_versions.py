@@ -0,0 +1,114 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from src.tenants import DEFAULT_TENANT
+
+INDEX_VERSIONS_COLLECTION = os.getenv("INDEX_VERSIONS_COLLECTION", "Index_Generations")
+# Generations kept after a swap (the live one plus the previous ones, so
+# queries still holding the old pointer keep working while it drains)
+INDEX_KEEP_GENERATIONS = int(os.getenv("INDEX_KEEP_GENERATIONS", "2"))
+# How long a process trusts its cached copy of the live-generation pointer
+INDEX_POINTER_CACHE_SECONDS = float(os.getenv("INDEX_POINTER_CACHE_SECONDS", "5"))
+
+def namespace_for(generation: int, tenant: str = DEFAULT_TENANT) -> str:
+    # Other tenants share the vector index, so their namespaces carry the tenant id
+    if tenant != DEFAULT_TENANT:
+        return f"{tenant}-gen-{generation}"
+    # Generation 0 is the default namespace written before versioning existed
+    return f"gen-{generation}" if generation else ""
+
+
+class IndexVersions:
+    """Blue/green generations of the vector index.
+
+    Each sync writes a complete copy of the data into a fresh namespace
+    (`begin`), and only when it finished does `commit` swap the live pointer,
+    a single document in Mongo, so every process flips at once and queries
+    never see a half-written index. Older namespaces beyond
+    INDEX_KEEP_GENERATIONS are deleted afterwards.
+    """
+
+    def __init__(self, db, index, tenant: str = DEFAULT_TENANT):
+        self.collection = db[INDEX_VERSIONS_COLLECTION]
+        self.index = index
+        self.tenant = tenant
+        prefix = "" if tenant == DEFAULT_TENANT else re.escape(f"{tenant}-")
+        self._namespace_re = re.compile(rf"^{prefix}gen-(\d+)$")
+        self._active = (0, namespace_for(0, tenant))
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def active(self) -> Tuple[int, str]:
+        """(generation, namespace) currently served to queries"""
+        with self._lock:
+            if time.monotonic() - self._checked > INDEX_POINTER_CACHE_SECONDS:
+                try:
+                    doc = self.collection.find_one({"_id": "active"})
+                    if doc:
+                        self._active = (doc["generation"], doc["namespace"])
+                    self._checked = time.monotonic()
+                except Exception as e:
+                    print(f"[Index] Could not read the active generation, keeping {self._active}: {e}")
+            return self._active
+
+    def generation(self) -> int:
+        return self.active()[0]
+
+    def namespace(self) -> str:
+        return self.active()[1]
+
+    def begin(self) -> Tuple[int, str]:
+        """Allocate the next generation to build into"""
+        doc = self.collection.find_one_and_update(
+            {"_id": "counter"}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        generation = max(doc["seq"], self.active()[0] + 1)
+        print(f"[Index] Building generation {generation} for tenant {self.tenant}")
+        return generation, namespace_for(generation, self.tenant)
+
+    def commit(self, generation: int, namespace: str):
+        """Atomically make `generation` live, then collect old generations"""
+        self.collection.update_one(
+            {"_id": "active"},
+            {"$set": {"generation": generation, "namespace": namespace, "swappedAt": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        with self._lock:
+            self._active = (generation, namespace)
+            self._checked = time.monotonic()
+        print(f"[Index] Generation {generation} is live for tenant {self.tenant}")
+        self.gc(generation)
+
+    def abort(self, namespace: str):
+        """Drop a build that will never go live"""
+        print(f"[Index] Discarding incomplete build {namespace!r}")
+        self._drop(namespace)
+
+    def gc(self, live_generation: int):
+        # Builds newer than the live generation may still be in progress elsewhere
+        oldest_kept = live_generation - max(1, INDEX_KEEP_GENERATIONS) + 1
+        try:
+            namespaces = self.index.describe_index_stats().get("namespaces", {}) or {}
+        except Exception as e:
+            print(f"[Index] Could not list namespaces for cleanup: {e}")
+            return
+        for namespace in list(namespaces):
+            # Only this tenant's generations are candidates
+            match = self._namespace_re.match(namespace)
+            legacy = namespace == "" and self.tenant == DEFAULT_TENANT
+            generation = int(match.group(1)) if match else (0 if legacy else None)
+            if generation is not None and generation < oldest_kept:
+                self._drop(namespace)
+
+    def _drop(self, namespace: str):
+        try:
+            self.index.delete(delete_all=True, namespace=namespace)
+            print(f"[Index] Deleted namespace {namespace!r}")
+        except Exception as e:
+            print(f"[Index] Could not delete namespace {namespace!r}: {e}")
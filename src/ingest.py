@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Bulk-ingest local files into the vector index.
+
+Streams TSV, CSV, JSONL, Markdown/plain text and Mongo Extended JSON exports
+(such as src/data/revenue_data.txt) into the tenant's INGEST_COLLECTION in
+Mongo, with a pool of workers processing batches in parallel. Completed
+batches are recorded in a checkpoint file, so an interrupted run picks up
+where it stopped when started again.
+
+Every sync reads INGEST_COLLECTION like the other input collections, so the
+documents survive restarts and later syncs. The live index generation is
+never written in place: when the files are stored, a new generation is
+built and swapped in (skip with --no-sync to leave it to the next scheduled
+sync). With SHARED_CACHE_PATH set the workers also embed the chunks ahead,
+so that build only reads cached vectors.
+
+Usage:
+    python -m src.ingest src/data [more files or dirs] [--workers 4] [--tenant acme]
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from src.tenants import DEFAULT_TENANT, UnknownTenant, current_tenant, validate_tenant
+from src.vector_db_pipeline import (
+    INGEST_COLLECTION, SYNC_EMBED_BATCH_SIZE, chunk_text, embedding_cache, get_embeddings, sync_generation,
+    tenant_db
+)
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+INGEST_CHECKPOINT_PATH = os.getenv("INGEST_CHECKPOINT_PATH", "ingest_checkpoint.json")
+# Rows of a plain table (no text column) embedded together, header repeated
+INGEST_TABLE_ROWS = int(os.getenv("INGEST_TABLE_ROWS", "50"))
+PROGRESS_SECONDS = 2.0
+CHARS_PER_TOKEN = 4  # rough estimate, same as SYNC_CHUNK_CHARS
+
+FORMATS = {
+    ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "json",
+    ".csv": "csv", ".tsv": "tsv", ".md": "text", ".markdown": "text",
+}
+TEXT_FIELDS = ("content", "text")
+
+csv.field_size_limit(sys.maxsize)
+
+
+def detect_format(path: str) -> str:
+    """File format from the extension, or sniffed from the first line for .txt"""
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt:
+        return fmt
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        first = next((line for line in f if line.strip()), "").strip()
+        second = f.readline()
+    if first.startswith(("{", "[")):
+        try:
+            json.loads(first)
+            return "jsonl"
+        except ValueError:
+            return "json"
+    if "\t" in first and not first.startswith("#"):
+        return "tsv"
+    header = next(csv.reader([first]))
+    if len(header) > 1 and all(re.match(r"^[\w .-]+$", h) for h in header) \
+            and len(next(csv.reader([second]), [])) == len(header):
+        return "csv"
+    return "text"
+
+
+def _plain(value):
+    """Mongo Extended JSON ({"$oid": ...}, {"$numberLong": ...}) to plain values.
+    {"$date": ...} is kept, metadata_filters.to_timestamp understands it."""
+    if isinstance(value, dict):
+        if len(value) == 1:
+            key, inner = next(iter(value.items()))
+            if key == "$oid":
+                return str(inner)
+            if key in ("$numberLong", "$numberInt"):
+                return int(inner)
+            if key in ("$numberDouble", "$numberDecimal"):
+                return float(inner)
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _json_doc(obj) -> Dict:
+    doc = _plain(obj) if isinstance(obj, dict) else {"content": obj}
+    text = next((doc[f] for f in TEXT_FIELDS if isinstance(doc.get(f), str) and doc[f].strip()), None)
+    if text is None:
+        text = json.dumps({k: v for k, v in doc.items() if k not in ("_id", "__v")}, default=str)
+    doc["content"] = text
+    return doc
+
+
+def _table_docs(path: str, delimiter: str) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if not header:
+            return
+        fields = [h.strip() for h in header]
+        text_field = next((h for h in fields if h.lower() in TEXT_FIELDS), None)
+        if text_field:
+            # One document per row (e.g. the fraud export: _id,text)
+            for row in reader:
+                doc = dict(zip(fields, row))
+                doc["content"] = doc.pop(text_field, "")
+                yield doc
+            return
+        rows = []
+        for row in reader:
+            rows.append("\t".join(row))
+            if len(rows) >= INGEST_TABLE_ROWS:
+                yield {"content": "\n".join(["\t".join(fields)] + rows)}
+                rows = []
+        if rows:
+            yield {"content": "\n".join(["\t".join(fields)] + rows)}
+
+
+def read_documents(path: str) -> Iterator[Dict]:
+    """Stream documents ({"content": text, ...metadata fields}) from one file"""
+    fmt = detect_format(path)
+    if fmt == "jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield _json_doc(json.loads(line))
+    elif fmt == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for obj in data if isinstance(data, list) else [data]:
+            yield _json_doc(obj)
+    elif fmt in ("csv", "tsv"):
+        yield from _table_docs(path, "," if fmt == "csv" else "\t")
+    else:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            yield {"content": f.read()}
+
+
+def read_batches(path: str, batch_size: int) -> Iterator[tuple]:
+    """(batch number, number of its first document, documents) for one file"""
+    batch, first = [], 0
+    for n, doc in enumerate(read_documents(path)):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield first // batch_size, first, batch
+            batch, first = [], n + 1
+    if batch:
+        yield first // batch_size, first, batch
+
+
+def expand_paths(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, n) for n in sorted(names)
+                          if os.path.splitext(n)[1].lower() in set(FORMATS) | {".txt"}]
+        else:
+            files.append(path)
+    return sorted(dict.fromkeys(os.path.normpath(f) for f in files))
+
+
+class Checkpoint:
+    """Completed batches per file, saved atomically after every batch.
+
+    A file whose size or mtime changed since the checkpoint starts over, and
+    so does everything when the batch size or target collection changed.
+    """
+
+    def __init__(self, path: str, batch_size: int, target: str, restart: bool = False):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {"batch_size": batch_size, "target": target, "files": {}}
+        if not restart and path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    saved = json.load(f)
+                if saved.get("batch_size") == batch_size and saved.get("target") == target:
+                    self.data = saved
+                else:
+                    print(f"[Ingest] Batch size or target changed, ignoring checkpoint {path}")
+            except Exception as e:
+                print(f"[Ingest] Could not read checkpoint {path}: {e}")
+
+    def file_state(self, path: str) -> Dict:
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        with self.lock:
+            state = self.data["files"].get(path)
+            if not state or state.get("signature") != signature:
+                state = {"signature": signature, "done": [], "complete": False}
+                self.data["files"][path] = state
+            return state
+
+    def mark(self, path: str, batch_no: int = None, complete: bool = False):
+        with self.lock:
+            state = self.data["files"][path]
+            if batch_no is not None:
+                state["done"].append(batch_no)
+            state["complete"] = state["complete"] or complete
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.data, f)
+        os.replace(tmp, self.path)
+
+
+class IngestStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.last_report = self.start
+        self.docs = self.chunks = self.vectors = self.tokens = self.skipped = self.failed = 0
+        self.store_seconds = self.index_seconds = 0.0
+
+    def add(self, docs=0, chunks=0, vectors=0, chars=0):
+        with self.lock:
+            self.docs += docs
+            self.chunks += chunks
+            self.vectors += vectors
+            self.tokens += chars // CHARS_PER_TOKEN
+            now = time.perf_counter()
+            if now - self.last_report >= PROGRESS_SECONDS:
+                self.last_report = now
+                print(f"[Ingest] {self.docs} docs, {self.vectors} vectors, "
+                      f"{self.docs / (now - self.start):.1f} docs/s")
+
+    def report(self):
+        # Throughput covers the whole run: reading, storing and building the generation
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        print(f"[Ingest] Done in {elapsed:.1f}s (store {self.store_seconds:.1f}s, index build {self.index_seconds:.1f}s): "
+              f"{self.docs} docs, {self.chunks} chunks, {self.vectors} vectors "
+              f"({self.skipped} batches already done, {self.failed} failed)")
+        print(f"[Ingest] End-to-end throughput: {self.docs / elapsed:.1f} docs/s, ~{self.tokens / elapsed:.0f} tokens/s")
+
+
+def _source_key(path: str) -> str:
+    """Path relative to the working directory, so same-named files in different folders stay apart"""
+    return os.path.relpath(os.path.abspath(path)).replace(os.sep, "/")
+
+
+def _prefix(path: str) -> str:
+    return re.sub(r"[^0-9a-z]+", "_", os.path.splitext(os.path.basename(path))[0].lower()).strip("_") or "file"
+
+
+def ingest_batch(path, first, docs, tenant, kind, stats):
+    """Store one batch in the ingest collection; True when every document was written.
+
+    Documents get stable ids (relative path + id or position), so retrying a
+    batch replaces what an interrupted run wrote instead of duplicating it.
+    """
+    source = os.path.basename(path)
+    key = _source_key(path)
+    domain = _prefix(path).split("_")[0]
+    now = datetime.now(timezone.utc)
+    writes, chunks, chars = [], [], 0
+    for i, doc in enumerate(docs, start=first):
+        text = doc.get("content", "")
+        if not isinstance(text, str):
+            text = str(text)
+        record = {k: v for k, v in doc.items() if k != "_id"}
+        record.update(content=text, domain=domain, kind=kind, sourcePath=path, ingestedAt=now)
+        record.setdefault("originalFileName", source)
+        writes.append(ReplaceOne({"_id": f"{key}:{doc.get('_id') or i}"}, record, upsert=True))
+        chunks += chunk_text(text)
+        chars += len(text)
+    if writes:
+        try:
+            result = tenant_db(tenant)[INGEST_COLLECTION].bulk_write(writes, ordered=False)
+        except BulkWriteError as e:
+            print(f"[Ingest] {len(e.details.get('writeErrors', []))} of {len(writes)} documents "
+                  f"from {path} were not written")
+            return False
+        # Every replace either matched or upserted; anything short was not stored
+        written = result.matched_count + result.upserted_count if result.acknowledged else 0
+        if written < len(writes):
+            print(f"[Ingest] Only {written} of {len(writes)} documents from {path} were confirmed written")
+            return False
+    embedded = 0
+    if embedding_cache is not None:
+        # Warm the shared cache so the generation build does not embed again
+        for start in range(0, len(chunks), SYNC_EMBED_BATCH_SIZE):
+            vectors = get_embeddings(chunks[start:start + SYNC_EMBED_BATCH_SIZE])
+            embedded += sum(v is not None for v in vectors)
+    stats.add(docs=len(docs), chunks=len(chunks), vectors=embedded, chars=chars)
+    return True
+
+
+def ingest_files(paths, workers=INGEST_WORKERS, batch_size=SYNC_EMBED_BATCH_SIZE, tenant=DEFAULT_TENANT,
+                 checkpoint_path=INGEST_CHECKPOINT_PATH, restart=False, kind="input", sync=True):
+    """Ingest files with a worker pool, then build a new index generation; returns IngestStats"""
+    tenant = validate_tenant(tenant)
+    current_tenant.set(tenant)
+    checkpoint = Checkpoint(checkpoint_path, batch_size, f"{tenant}/{INGEST_COLLECTION}", restart)
+    stats = IngestStats()
+    # Bound batches in flight so reading never runs far ahead of embedding
+    slots = threading.BoundedSemaphore(workers * 2)
+    print(f"[Ingest] {len(paths)} files -> {tenant}/{INGEST_COLLECTION} with {workers} workers")
+
+    def run(path, batch_no, first, docs):
+        try:
+            if ingest_batch(path, first, docs, tenant, kind, stats):
+                checkpoint.mark(path, batch_no)
+                return True
+            print(f"[Ingest] Batch {batch_no} of {path} incomplete, will retry on the next run")
+        except Exception as e:
+            print(f"[Ingest] Batch {batch_no} of {path} failed: {e}")
+        with stats.lock:
+            stats.failed += 1
+        return False
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+        for path in paths:
+            state = checkpoint.file_state(path)
+            if state["complete"]:
+                print(f"[Ingest] {path} already ingested, skipping")
+                continue
+            done = set(state["done"])
+            futures = []
+            try:
+                for batch_no, first, docs in read_batches(path, batch_size):
+                    if batch_no in done:
+                        stats.skipped += 1
+                        continue
+                    slots.acquire()
+                    future = pool.submit(run, path, batch_no, first, docs)
+                    future.add_done_callback(lambda _f: slots.release())
+                    futures.append(future)
+            except Exception as e:
+                print(f"[Ingest] Could not read {path}: {e}")
+                continue
+            if all(f.result() for f in futures):
+                checkpoint.mark(path, complete=True)
+    stats.store_seconds = time.perf_counter() - stats.start
+    if sync and not stats.failed:
+        # The stored documents go live together with a complete generation
+        if sync_generation(tenant) is None:
+            print("[Ingest] Building the new generation failed; the next sync will retry")
+            stats.failed += 1
+        stats.index_seconds = time.perf_counter() - stats.start - stats.store_seconds
+    stats.report()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest local files into the vector index")
+    parser.add_argument("paths", nargs="+", help="files or directories (.txt, .md, .csv, .tsv, .json, .jsonl)")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=SYNC_EMBED_BATCH_SIZE, help="documents per batch")
+    parser.add_argument("--tenant", default=DEFAULT_TENANT)
+    parser.add_argument("--no-sync", action="store_true",
+                        help="only store the documents; the next scheduled sync indexes them")
+    parser.add_argument("--kind", default="input", choices=["input", "output"])
+    parser.add_argument("--checkpoint", default=INGEST_CHECKPOINT_PATH)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and ingest everything")
+    args = parser.parse_args()
+    try:
+        tenant = validate_tenant(args.tenant)
+    except UnknownTenant as e:
+        parser.error(str(e))
+
+    stats = ingest_files(expand_paths(args.paths), args.workers, args.batch_size, tenant,
+                         args.checkpoint, args.restart, args.kind, not args.no_sync)
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,137 @@
+import os
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.summary_store import DOMAIN_QUERY_HINTS
+
+# Fall back to nearest-centroid classification when no rule matches
+INTENT_CENTROIDS = os.getenv("INTENT_CENTROIDS", "false").lower() == "true"
+INTENT_CENTROID_MIN_SCORE = float(os.getenv("INTENT_CENTROID_MIN_SCORE", "0.8"))
+
+IDENTITY = "identity"
+SMALL_TALK = "small_talk"
+BUSINESS_DATA = "business_data"
+GENERAL = "general"
+
+NAME_RE = re.compile(r"\b(your name|who are you|what are you|introduce yourself)\b")
+CREATOR_RE = re.compile(
+    r"\b(who (built|made|created|developed|designed|trained) you|your (creators?|developers?|makers?|team))\b"
+)
+SMALL_TALK_PHRASE = (
+    r"(hi|hello|hey|yo|hiya|howdy|good (morning|afternoon|evening|night)|thanks|thank you|thx|"
+    r"ok(ay)?|cool|great|nice|bye|goodbye|see you( later| soon)?|how are you( doing)?( today)?|"
+    r"how's it going|what's up|tell me a joke|you('re| are) (great|awesome|funny|smart)|"
+    r"there|again|a lot|so much|everyone|all)"
+)
+# Only messages made entirely of greetings/pleasantries; "hey, which region..." is a question
+SMALL_TALK_RE = re.compile(rf"^{SMALL_TALK_PHRASE}([\s,.!?:;)(-]+{SMALL_TALK_PHRASE})*[\s,.!?:;)(-]*$")
+BUSINESS_RE = re.compile(r"\b(" + "|".join(sorted(
+    {h for hints in DOMAIN_QUERY_HINTS.values() for h in hints} | {
+        "data", "report", "metric", "metrics", "kpi", "amount", "profit", "growth", "trend", "trends",
+        "analysis", "customer", "customers", "performance", "summary", "upload", "uploaded", "business",
+        "total", "totals", "average", "region", "regions", "order", "orders", "product",
+        "products", "transactions", "payment", "payments", "transfer", "transfers", "debit",
+        "cash_out", "cash_in", "cash out", "cash in",
+    }
+)) + r")\b")
+
+# Example phrases the optional centroid model is built from
+INTENT_EXAMPLES = {
+    IDENTITY: ["what's your name", "who are you", "who built you", "who made you", "introduce yourself"],
+    SMALL_TALK: ["hello there", "how are you today", "thanks a lot", "tell me a joke", "good morning", "see you later"],
+    BUSINESS_DATA: [
+        "what's the fraud situation", "show me revenue numbers", "market trends this quarter",
+        "summarize the uploaded data", "how is the financial performance", "largest transactions last month",
+    ],
+}
+
+
+def identity_templates(description: str) -> Dict[str, str]:
+    """Canned identity answers from the "If the user asks ..., say ..." lines in tasks.yaml"""
+    templates = {}
+    # The YAML block is folded onto one line, so each answer ends at the next rule or section header
+    pattern = r"If the user asks (about your name|who built you), say (.+?)\.?(?=\s+If the user asks|\s+[A-Z]{2,}|\s*$)"
+    for match in re.finditer(pattern, description or ""):
+        answer = match.group(2).strip()
+        answer = re.sub(r"^you are\b", "I'm", answer)
+        answer = re.sub(r"^you were\b", "I was", answer)
+        answer = answer[0].upper() + answer[1:]
+        if not answer.endswith("."):
+            answer += "."
+        templates["name" if "name" in match.group(1) else "creator"] = answer
+    return templates
+
+
+class Route:
+    __slots__ = ("intent", "answer", "vector")
+
+    def __init__(self, intent: str, answer: Optional[str] = None, vector: Optional[List[float]] = None):
+        self.intent = intent
+        self.answer = answer
+        # Query embedding computed by the centroid model, reusable for retrieval
+        self.vector = vector
+
+
+class IntentRouter:
+    """Cheap pre-generation routing of a query to a pipeline.
+
+    Keyword/regex rules run first and take microseconds. When no rule fires
+    and an `embed_many` function is given, the query is matched against
+    per-intent centroids of INTENT_EXAMPLES; below INTENT_CENTROID_MIN_SCORE
+    it is left as `general` (full pipeline).
+    """
+
+    def __init__(self, templates: Dict[str, str], embed_many: Optional[Callable[[Sequence[str]], List[List[float]]]] = None):
+        self.templates = templates
+        self.embed_many = embed_many
+        self._centroids = None
+
+    def _identity_answer(self, q: str) -> Optional[str]:
+        if CREATOR_RE.search(q) and "creator" in self.templates:
+            answer = self.templates["creator"]
+            if NAME_RE.search(q) and "name" in self.templates:
+                answer = f"{self.templates['name']} {answer}"
+            return answer
+        if NAME_RE.search(q) and "name" in self.templates:
+            return f"{self.templates['name'].rstrip('.')}, your AI assistant. How can I help you today?"
+        return None
+
+    def _centroid_intent(self, query: str):
+        import numpy as np
+        if self._centroids is None:
+            names, rows = [], []
+            for intent, examples in INTENT_EXAMPLES.items():
+                vectors = np.asarray(self.embed_many(examples), dtype=np.float32)
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                centroid = vectors.mean(axis=0)
+                names.append(intent)
+                rows.append(centroid / np.linalg.norm(centroid))
+            self._centroids = (names, np.stack(rows))
+        names, matrix = self._centroids
+        vector = self.embed_many([query])[0]
+        v = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ (v / np.linalg.norm(v))
+        best = int(scores.argmax())
+        intent = names[best] if scores[best] >= INTENT_CENTROID_MIN_SCORE else GENERAL
+        return intent, vector
+
+    def route(self, query: str) -> Route:
+        q = " ".join(query.lower().split())
+        # Business hints win: "who are you and what market data do you have" needs retrieval
+        if BUSINESS_RE.search(q):
+            return Route(BUSINESS_DATA)
+        short = len(q.split()) <= 12
+        if short:
+            answer = self._identity_answer(q)
+            if answer:
+                return Route(IDENTITY, answer=answer)
+        if SMALL_TALK_RE.match(q):
+            return Route(SMALL_TALK)
+        if self.embed_many is not None:
+            try:
+                intent, vector = self._centroid_intent(query)
+                # Identity via centroids has no specific template to pick; let the LLM answer
+                return Route(SMALL_TALK if intent == IDENTITY else intent, vector=vector)
+            except Exception as e:
+                print(f"[Intent] Centroid classification failed: {e}")
+        return Route(GENERAL)
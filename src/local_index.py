@@ -0,0 +1,618 @@
+import json
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.ann_index import create_ann_index
+from src.metadata_filters import matches_filter
+
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", os.path.join(os.path.dirname(__file__), "data", "local_index"))
+LOCAL_INDEX_QUANTIZATION = os.getenv("LOCAL_INDEX_QUANTIZATION", "int8").lower()  # none | int8
+LOCAL_INDEX_RERANK_FACTOR = int(os.getenv("LOCAL_INDEX_RERANK_FACTOR", "8"))
+LOCAL_INDEX_ANN = os.getenv("LOCAL_INDEX_ANN", "none").lower()  # none | hnsw | ivf
+# Buffered upserts are written out once this many are pending, so a large
+# sync never holds more than one chunk of vectors in Python lists
+LOCAL_INDEX_FLUSH_BATCH = int(os.getenv("LOCAL_INDEX_FLUSH_BATCH", "20000"))
+# Replaced and deleted rows are only tombstoned; the live rows are rewritten
+# into a fresh epoch once this fraction of the stored rows is dead
+LOCAL_INDEX_COMPACT_RATIO = float(os.getenv("LOCAL_INDEX_COMPACT_RATIO", "0.25"))
+
+# The int8 scale is fixed per epoch and re-fitted by a compaction whenever the
+# index has grown 4x past the rows it was fitted on, until it covers this many
+SCALE_REFIT_ROWS = 100000
+BLOCK = 65536
+EPOCH_FILE_RE = re.compile(r"^(?:vectors|codes|scale|offsets|ids|metadata|deleted)\.(\d+)\.")
+_pread_lock = threading.Lock()
+
+
+@contextmanager
+def _process_lock(path):
+    """Serialize snapshot writes and reloads across worker processes"""
+    try:
+        import fcntl
+    except ImportError:  # Windows: single-process serving only
+        yield
+        return
+    with open(os.path.join(path, ".lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _pread(f, length, offset):
+    if hasattr(os, "pread"):
+        return os.pread(f.fileno(), length, offset)
+    with _pread_lock:
+        f.seek(offset)
+        return f.read(length)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _fit_scale(max_abs):
+    # Symmetric per-dimension scale so each int8 code spans [-127, 127]
+    max_abs = np.array(max_abs, dtype=np.float32)
+    max_abs[max_abs == 0] = 1.0
+    return (max_abs / 127.0).astype(np.float32)
+
+
+def _encode(rows, scale):
+    return np.clip(np.rint(rows / scale), -127, 127).astype(np.int8)
+
+
+class LocalIndex:
+    """Self-hosted cosine-similarity index with a Pinecone-compatible API.
+
+    Storage is append-only within an epoch: L2-normalized float32 rows in
+    `vectors.<epoch>.f32`, their int8 codes in `codes.<epoch>.i8` (with a
+    per-epoch `scale.<epoch>.npy`), ids in `ids.<epoch>.jsonl` and metadata in
+    `metadata.<epoch>.jsonl`, located through the (start, length) pairs in
+    `offsets.<epoch>.i64`. `meta.json` is a small manifest recording how much
+    of each file is committed; replacing it is the commit point. Vectors,
+    codes and offsets are memory-mapped, so only ids are held in memory and a
+    flush writes only the rows it adds. Replaced and deleted rows are recorded
+    in `deleted.<epoch>.i64` and masked out of searches until a compaction
+    rewrites the live rows into the next epoch.
+
+    For large corpora an ANN index (`ann="hnsw"` or `"ivf"`, see
+    src/ann_index.py) replaces the full scan as the candidate generator. It is
+    updated incrementally on flush and snapshotted next to the vectors.
+
+    Upserts and deletes are buffered and written out on `flush()`, or once
+    `flush_batch` of them are pending. Queries never write: they only re-map
+    the snapshot when another process has committed to it. Several processes
+    can share one directory: the mapped files are shared through the page
+    cache and writes are serialized by a lock file.
+    """
+
+    def __init__(self, path: str = LOCAL_INDEX_DIR, dimension: int = 1536,
+                 quantization: str = LOCAL_INDEX_QUANTIZATION,
+                 rerank_factor: int = LOCAL_INDEX_RERANK_FACTOR,
+                 ann: str = LOCAL_INDEX_ANN, flush_batch: int = LOCAL_INDEX_FLUSH_BATCH):
+        if quantization not in ("none", "int8"):
+            raise ValueError(f"Unknown quantization '{quantization}'. Choose from: none, int8")
+        self.path = path
+        self.dimension = dimension
+        self.quantization = quantization
+        self.rerank_factor = max(1, rerank_factor)
+        self.flush_batch = max(1, flush_batch)
+        self._lock = threading.RLock()
+        self.ids: List[str] = []  # every stored row of the epoch, dead ones included
+        self.deleted = np.zeros(0, dtype=bool)
+        self.vectors = np.zeros((0, dimension), dtype=np.float32)
+        self.offsets = np.zeros((0, 2), dtype=np.int64)
+        self.codes = None
+        self.scale = None
+        self._manifest = None
+        self._metadata_file = None
+        self._positions: Dict[str, int] = {}  # id -> live row
+        self._filter_cache: Dict[str, np.ndarray] = {}
+        self._pending: Dict[str, Optional[dict]] = {}  # id -> record, or None for delete
+        self.ann = create_ann_index(ann, dimension)
+        self._version = None  # identity of the meta.json this process has mapped
+        os.makedirs(self.path, exist_ok=True)
+        with _process_lock(self.path):
+            self.load()
+
+    # --- persistence ---
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _epoch_file(self, kind, ext, epoch=None):
+        epoch = self._manifest["epoch"] if epoch is None else epoch
+        return self._file(f"{kind}.{epoch}.{ext}")
+
+    def _disk_version(self):
+        try:
+            stat = os.stat(self._file("meta.json"))
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns  # meta.json is replaced, never rewritten in place
+
+    def _empty_manifest(self):
+        return {"format": 2, "dimension": self.dimension, "epoch": 0, "rows": 0,
+                "ids_bytes": 0, "metadata_bytes": 0, "deleted": 0, "scale_rows": 0}
+
+    def _write_manifest(self, manifest):
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    def load(self, reload_ann=True):
+        """Map the committed snapshot (no-op for a fresh directory).
+
+        Within one epoch only the ids and tombstones appended since the last
+        load are read; a new epoch is mapped from scratch. Callers hold the
+        process lock.
+        """
+        with self._lock:
+            if not os.path.exists(self._file("meta.json")):
+                return
+            version = self._disk_version()
+            with open(self._file("meta.json"), "r") as f:
+                manifest = json.load(f)
+            if manifest["dimension"] != self.dimension:
+                raise ValueError(
+                    f"Local index at {self.path} is {manifest['dimension']}-dim, embedder is {self.dimension}-dim"
+                )
+            if "format" not in manifest:
+                manifest = self._migrate(manifest)
+                version = self._disk_version()
+            previous = self._manifest
+            if previous is None or previous["epoch"] != manifest["epoch"] or previous["rows"] > manifest["rows"]:
+                previous = None
+                self.ids, self._positions = [], {}
+                self.deleted = np.zeros(0, dtype=bool)
+                self._metadata_file, self.scale = None, None
+            self._manifest = manifest
+            self._version = version
+            self._extend(previous or self._empty_manifest(), manifest)
+            self._filter_cache = {}
+
+            rows = manifest["rows"]
+            if self._metadata_file is None and rows:
+                self._metadata_file = open(self._epoch_file("metadata", "jsonl"), "rb")
+            if self.scale is None and os.path.exists(self._epoch_file("scale", "npy")):
+                self.scale = np.load(self._epoch_file("scale", "npy"))
+            self.vectors = self._map("vectors", "f32", np.float32, (rows, self.dimension))
+            self.offsets = self._map("offsets", "i64", np.int64, (rows, 2))
+            self.codes = None
+            if self.quantization == "int8" and self.scale is not None and rows:
+                codes = self._map("codes", "i8", np.int8, (rows, self.dimension))
+                self.codes = codes if len(codes) == rows else None
+            if self.ann is not None and reload_ann and not self.ann.load(self._file("ann")):
+                self._build_ann()
+            print(f"Loaded local index with {self.count()} vectors ({self.quantization})")
+
+    def _extend(self, previous, manifest):
+        # Ids and tombstones are append-only, so read just what was committed since `previous`
+        new_ids = []
+        if manifest["ids_bytes"] > previous["ids_bytes"]:
+            with open(self._epoch_file("ids", "jsonl"), "rb") as f:
+                f.seek(previous["ids_bytes"])
+                data = f.read(manifest["ids_bytes"] - previous["ids_bytes"])
+            new_ids = [json.loads(line) for line in data.splitlines()]
+        for row, vid in enumerate(new_ids, start=len(self.ids)):
+            self._positions[vid] = row
+        self.ids.extend(new_ids)
+
+        deleted = np.zeros(manifest["rows"], dtype=bool)
+        deleted[:len(self.deleted)] = self.deleted
+        if manifest["deleted"] > previous["deleted"]:
+            dead = np.fromfile(self._epoch_file("deleted", "i64"), dtype=np.int64,
+                               count=manifest["deleted"] - previous["deleted"], offset=previous["deleted"] * 8)
+            deleted[dead] = True
+            for row in dead.tolist():
+                if self._positions.get(self.ids[row]) == row:
+                    del self._positions[self.ids[row]]
+        self.deleted = deleted
+
+    def _map(self, kind, ext, dtype, shape):
+        # np.memmap cannot map an empty file; files may also run past the
+        # manifest (a writer mid-flush), so map only the committed rows
+        path = self._epoch_file(kind, ext)
+        size = shape[0] * shape[1] * np.dtype(dtype).itemsize
+        if not shape[0] or not os.path.exists(path) or os.path.getsize(path) < size:
+            return np.zeros((0, shape[1]), dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+    def _migrate(self, meta):
+        """Rewrite a single-file snapshot (meta.json with ids and metadata) as epoch 1"""
+        vectors = np.load(self._file("vectors.npy"), mmap_mode="r")
+        ids, metadata = meta["ids"], meta["metadata"]
+        manifest = self._write_epoch(1, ids, lambda s, e: vectors[s:e], lambda i: metadata[i])
+        self._write_manifest(manifest)
+        for name in ("vectors.npy", "codes.npy", "scale.npy"):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        print(f"Migrated local index at {self.path} to append-only storage ({len(ids)} vectors)")
+        return manifest
+
+    def _write_epoch(self, epoch, ids, block, metadata_at):
+        """Write `ids` (rows from `block(start, end)`) as a new, fully live epoch"""
+        n = len(ids)
+        scale = None
+        if self.quantization == "int8" and n:
+            max_abs = np.zeros(self.dimension, dtype=np.float32)
+            for start in range(0, n, BLOCK):
+                np.maximum(max_abs, np.abs(block(start, min(n, start + BLOCK))).max(axis=0), out=max_abs)
+            scale = _fit_scale(max_abs)
+            np.save(self._file(f"scale.{epoch}.npy"), scale)
+        ids_bytes = metadata_bytes = 0
+        with open(self._file(f"vectors.{epoch}.f32"), "wb") as vf, \
+                open(self._file(f"codes.{epoch}.i8"), "wb") as cf, \
+                open(self._file(f"offsets.{epoch}.i64"), "wb") as of, \
+                open(self._file(f"ids.{epoch}.jsonl"), "wb") as idf, \
+                open(self._file(f"metadata.{epoch}.jsonl"), "wb") as mf, \
+                open(self._file(f"deleted.{epoch}.i64"), "wb"):
+            for start in range(0, n, BLOCK):
+                end = min(n, start + BLOCK)
+                rows = np.ascontiguousarray(block(start, end), dtype=np.float32)
+                vf.write(rows.tobytes())
+                if scale is not None:
+                    cf.write(_encode(rows, scale).tobytes())
+                lines = [(json.dumps(metadata_at(i), default=str) + "\n").encode() for i in range(start, end)]
+                lengths = np.array([len(line) for line in lines], dtype=np.int64)
+                of.write(np.stack([metadata_bytes + np.cumsum(lengths) - lengths, lengths], axis=1).tobytes())
+                metadata_bytes += mf.write(b"".join(lines))
+                ids_bytes += idf.write("".join(json.dumps(vid) + "\n" for vid in ids[start:end]).encode())
+        return {**self._empty_manifest(), "epoch": epoch, "rows": n, "ids_bytes": ids_bytes,
+                "metadata_bytes": metadata_bytes, "scale_rows": n if scale is not None else 0}
+
+    def _truncate_tails(self, manifest):
+        # Drop whatever a writer that crashed mid-flush appended past the manifest
+        rows = manifest["rows"]
+        sizes = {("vectors", "f32"): rows * self.dimension * 4, ("codes", "i8"): rows * self.dimension,
+                 ("offsets", "i64"): rows * 16, ("ids", "jsonl"): manifest["ids_bytes"],
+                 ("metadata", "jsonl"): manifest["metadata_bytes"], ("deleted", "i64"): manifest["deleted"] * 8}
+        for (kind, ext), size in sizes.items():
+            path = self._file(f"{kind}.{manifest['epoch']}.{ext}")
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def _remove_stale_epochs(self):
+        # Readers still mapping an old epoch keep their open files until they re-map
+        for name in os.listdir(self.path):
+            match = EPOCH_FILE_RE.match(name)
+            if match and int(match.group(1)) != self._manifest["epoch"]:
+                try:
+                    os.remove(self._file(name))
+                except OSError:
+                    pass
+
+    def _live_rows(self):
+        return np.flatnonzero(~self.deleted)
+
+    def _build_ann(self):
+        live = self._live_rows()
+        ids = [self.ids[row] for row in live]
+        print(f"Building {self.ann.kind} index over {len(ids)} vectors")
+        if hasattr(self.ann, "rebuild") and self.ann.needs_training(len(ids)):
+            self.ann.rebuild(ids, self.vectors[live])
+        else:
+            for start in range(0, len(ids), BLOCK):
+                self.ann.add(ids[start:start + BLOCK], self.vectors[live[start:start + BLOCK]])
+        self.ann.save(self._file("ann"))
+
+    def _update_ann(self, upserted, deleted):
+        self.ann.remove(deleted)
+        if hasattr(self.ann, "needs_training") and self.ann.needs_training(self.count()):
+            live = self._live_rows()
+            self.ann.rebuild([self.ids[row] for row in live], self.vectors[live])
+        elif upserted:
+            rows = np.array([self._positions[vid] for vid in upserted])
+            self.ann.add(upserted, self.vectors[rows])
+        self.ann.save(self._file("ann"))
+
+    def refresh(self):
+        """Re-map the snapshot if another process has committed to it (one stat call)"""
+        version = self._disk_version()
+        if version is not None and version != self._version:
+            with self._lock, _process_lock(self.path):
+                self.load()
+
+    def flush(self):
+        """Apply buffered upserts/deletes, persist, and re-map from disk"""
+        with self._lock:
+            if not self._pending:
+                self.refresh()
+                return
+            with _process_lock(self.path):
+                if self._disk_version() != self._version:
+                    self.load()
+                self._apply_pending()
+
+    def _append(self, kind, ext, data):
+        with open(self._epoch_file(kind, ext), "ab") as f:
+            return f.write(data)
+
+    def _apply_pending(self):
+        with self._lock:
+            if self._manifest is None:
+                self._manifest = self._empty_manifest()
+            manifest = dict(self._manifest)
+            self._truncate_tails(manifest)
+            rows = manifest["rows"]
+            upserted = [(vid, record) for vid, record in self._pending.items() if record is not None]
+            deleted = [vid for vid, record in self._pending.items() if record is None]
+            # Every pending id that is already stored loses its current row
+            dead = np.array([self._positions[vid] for vid in self._pending if vid in self._positions], dtype=np.int64)
+            self._pending.clear()
+
+            if upserted:
+                matrix = _normalize(np.asarray([record["values"] for _, record in upserted], dtype=np.float32))
+                self._append("vectors", "f32", matrix.tobytes())
+                if self.quantization == "int8":
+                    if self.scale is None and rows == 0:
+                        self.scale = _fit_scale(np.abs(matrix).max(axis=0))
+                        np.save(self._epoch_file("scale", "npy"), self.scale)
+                        manifest["scale_rows"] = len(matrix)
+                    codes_path = self._epoch_file("codes", "i8")
+                    codes_rows = os.path.getsize(codes_path) // self.dimension if os.path.exists(codes_path) else 0
+                    if self.scale is not None and codes_rows == rows:
+                        self._append("codes", "i8", _encode(matrix, self.scale).tobytes())
+                lines = [(json.dumps(record.get("metadata", {}), default=str) + "\n").encode() for _, record in upserted]
+                lengths = np.array([len(line) for line in lines], dtype=np.int64)
+                starts = manifest["metadata_bytes"] + np.cumsum(lengths) - lengths
+                self._append("offsets", "i64", np.stack([starts, lengths], axis=1).tobytes())
+                manifest["metadata_bytes"] += self._append("metadata", "jsonl", b"".join(lines))
+                manifest["ids_bytes"] += self._append(
+                    "ids", "jsonl", "".join(json.dumps(vid) + "\n" for vid, _ in upserted).encode())
+                manifest["rows"] += len(upserted)
+            if len(dead):
+                self._append("deleted", "i64", dead.tobytes())
+                manifest["deleted"] += len(dead)
+            self._write_manifest(manifest)
+            self.load(reload_ann=False)
+
+            if self.ann is not None:
+                self._update_ann([vid for vid, _ in upserted], deleted)
+            if self._needs_compaction():
+                self._compact()
+            print(f"Flushed local index: {self.count()} vectors ({len(upserted)} appended, {len(dead)} tombstoned)")
+
+    def _needs_compaction(self):
+        manifest = self._manifest
+        if not manifest["rows"]:
+            return False
+        if manifest["deleted"] > LOCAL_INDEX_COMPACT_RATIO * manifest["rows"]:
+            return True
+        if self.quantization == "int8":
+            # Codes missing (written without quantization) or a scale fitted on too few rows
+            scale_rows = manifest["scale_rows"]
+            return self.codes is None or (scale_rows < SCALE_REFIT_ROWS and manifest["rows"] > 4 * scale_rows)
+        return False
+
+    def _compact(self):
+        """Rewrite the live rows into the next epoch and drop the old one"""
+        live = self._live_rows()
+        stored = self._manifest["rows"]
+        manifest = self._write_epoch(self._manifest["epoch"] + 1, [self.ids[row] for row in live],
+                                     lambda s, e: self.vectors[live[s:e]], lambda i: self.metadata_at(live[i]))
+        self._write_manifest(manifest)
+        self.load(reload_ann=False)
+        self._remove_stale_epochs()
+        print(f"Compacted local index: kept {len(live)} of {stored} rows")
+
+    # --- Pinecone-compatible API ---
+    def upsert(self, vectors: List[dict], **kwargs):
+        with self._lock:
+            for record in vectors:
+                if len(record["values"]) != self.dimension:
+                    raise ValueError(f"Vector {record['id']} has dimension {len(record['values'])}, expected {self.dimension}")
+                self._pending[record["id"]] = record
+            if len(self._pending) >= self.flush_batch:
+                self.flush()
+        return {"upserted_count": len(vectors)}
+
+    def delete(self, ids: List[str], **kwargs):
+        with self._lock:
+            for vid in ids:
+                self._pending[vid] = None
+            if len(self._pending) >= self.flush_batch:
+                self.flush()
+
+    def count(self):
+        """Live vectors in the mapped snapshot"""
+        return len(self._positions)
+
+    def describe_index_stats(self, **kwargs):
+        # Counts what is on disk; buffered writes show up after flush()
+        self.refresh()
+        return {"dimension": self.dimension, "total_vector_count": self.count()}
+
+    def metadata_at(self, row):
+        """Metadata of one stored row, read from the sidecar by offset"""
+        start, length = self.offsets[row]
+        return json.loads(_pread(self._metadata_file, int(length), int(start)))
+
+    def _exact_scores(self, query, rows=None):
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        return vectors @ query
+
+    def _approx_scores(self, scaled_query, block=BLOCK):
+        # Scan the int8 codes in blocks so the float upcast stays bounded
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), block):
+            scores[start:start + block] = self.codes[start:start + block].astype(np.float32) @ scaled_query
+        return scores
+
+    def filter_rows(self, flt, block=4096):
+        """Live rows whose metadata matches a Pinecone-style filter (cached per snapshot)"""
+        key = json.dumps(flt, sort_keys=True, default=str)
+        rows = self._filter_cache.get(key)
+        if rows is None:
+            # Stream the sidecar a block of rows at a time instead of holding it in memory
+            found = []
+            for start in range(0, len(self.offsets), block):
+                end = min(len(self.offsets), start + block)
+                first, (last, length) = self.offsets[start][0], self.offsets[end - 1]
+                data = _pread(self._metadata_file, int(last + length - first), int(first))
+                for row, line in enumerate(data.splitlines(), start=start):
+                    if not self.deleted[row] and matches_filter(json.loads(line), flt):
+                        found.append(row)
+            rows = np.array(found, dtype=np.int64)
+            if len(self._filter_cache) > 256:
+                self._filter_cache.clear()
+            self._filter_cache[key] = rows
+        return rows
+
+    def search(self, query_vector, top_k=3, exact=False, filter=None):
+        """Return [(row, score)] for the best `top_k` live rows"""
+        self.refresh()
+        n = self.count()
+        if n == 0:
+            return []
+        query = _normalize(np.asarray([query_vector], dtype=np.float32))[0]
+
+        if filter:
+            # Narrow by metadata first, then score only the surviving rows
+            candidates = self.filter_rows(filter)
+            if not len(candidates):
+                return []
+            candidate_scores = self._exact_scores(query, candidates)
+            order = np.argsort(-candidate_scores)[:top_k]
+            return [(int(candidates[i]), float(candidate_scores[i])) for i in order]
+
+        top_k = min(top_k, n)
+
+        shortlist = min(n, top_k * self.rerank_factor)
+        candidate_ids = None
+        if not exact and self.ann is not None:
+            candidate_ids = self.ann.candidates(query, shortlist)
+
+        if candidate_ids is not None:
+            candidates = np.sort(np.array([self._positions[vid] for vid in candidate_ids
+                                           if vid in self._positions], dtype=np.int64))
+            if not len(candidates):
+                return []
+            candidate_scores = self._exact_scores(query, candidates)
+        elif exact or self.codes is None:
+            scores = self._exact_scores(query)
+            scores[self.deleted] = -np.inf
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+            candidate_scores = scores[candidates]
+        else:
+            # Approximate scan over int8 codes, then float re-rank of the shortlist
+            approx = self._approx_scores(query * self.scale)
+            approx[self.deleted] = -np.inf
+            candidates = np.sort(np.argpartition(-approx, shortlist - 1)[:shortlist])
+            candidate_scores = self._exact_scores(query, candidates)
+
+        order = np.argsort(-candidate_scores)[:top_k]
+        return [(int(candidates[i]), float(candidate_scores[i])) for i in order]
+
+    def query(self, vector, top_k=3, include_metadata=True, filter=None, **kwargs):
+        matches = []
+        for row, score in self.search(vector, top_k, filter=filter):
+            match = {"id": self.ids[row], "score": score}
+            if include_metadata:
+                match["metadata"] = self.metadata_at(row)
+            matches.append(match)
+        return {"matches": matches}
+
+    # --- evaluation ---
+    def measure_recall(self, queries, k=10):
+        """Recall@k of the quantized/ANN search against exact float search"""
+        if (self.codes is None and self.ann is None) or not len(queries):
+            return 1.0
+        hits = 0
+        total = 0
+        for query in queries:
+            exact = {row for row, _ in self.search(query, k, exact=True)}
+            approx = {row for row, _ in self.search(query, k)}
+            hits += len(exact & approx)
+            total += len(exact)
+        recall = hits / total if total else 1.0
+        print(f"Local index recall@{k}: {recall:.3f} over {len(queries)} queries")
+        return recall
+
+    def memory_footprint(self):
+        """Bytes scanned per query (codes or floats) vs. full float storage"""
+        float_bytes = len(self.vectors) * self.dimension * 4
+        scan_bytes = self.codes.nbytes if self.codes is not None else float_bytes
+        return {"float_bytes": float_bytes, "scan_bytes": scan_bytes}
+
+
+class LocalIndexSet:
+    """Pinecone-style namespaces over LocalIndex snapshots.
+
+    The default namespace ("") lives in `path` itself, as before; every other
+    namespace is a separate LocalIndex under `path/namespaces/<name>`, so a
+    whole generation can be built alongside the live one and dropped with
+    one directory delete.
+    """
+
+    def __init__(self, path: str = LOCAL_INDEX_DIR, dimension: int = 1536, **options):
+        self.path = path
+        self.dimension = dimension
+        self.options = options
+        self._indexes: Dict[str, LocalIndex] = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, namespace):
+        return self.path if not namespace else os.path.join(self.path, "namespaces", namespace)
+
+    def namespace(self, namespace: str = "") -> LocalIndex:
+        with self._lock:
+            idx = self._indexes.get(namespace)
+            if idx is None:
+                idx = LocalIndex(self._dir(namespace), self.dimension, **self.options)
+                self._indexes[namespace] = idx
+            return idx
+
+    def namespaces(self) -> List[str]:
+        root = os.path.join(self.path, "namespaces")
+        names = os.listdir(root) if os.path.isdir(root) else []
+        return ([""] if os.path.exists(os.path.join(self.path, "meta.json")) else []) + sorted(names)
+
+    def upsert(self, vectors: List[dict], namespace: str = "", **kwargs):
+        return self.namespace(namespace).upsert(vectors)
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, namespace: str = "", **kwargs):
+        if not delete_all:
+            return self.namespace(namespace).delete(ids or [])
+        with self._lock:
+            self._indexes.pop(namespace, None)
+        if namespace:
+            shutil.rmtree(self._dir(namespace), ignore_errors=True)
+        else:
+            # The default namespace's files sit next to the namespaces/ directory
+            for name in os.listdir(self.path):
+                if os.path.isfile(os.path.join(self.path, name)):
+                    os.remove(os.path.join(self.path, name))
+
+    def query(self, vector, top_k=3, include_metadata=True, filter=None, namespace: str = "", **kwargs):
+        return self.namespace(namespace).query(vector, top_k, include_metadata, filter)
+
+    def describe_index_stats(self, **kwargs):
+        # Read-only: pending writes only reach disk (and these counts) on flush
+        counts = {}
+        for ns in self.namespaces():
+            idx = self.namespace(ns)
+            idx.refresh()
+            counts[ns] = idx.count()
+        return {
+            "dimension": self.dimension,
+            "total_vector_count": sum(counts.values()),
+            "namespaces": {ns: {"vector_count": n} for ns, n in counts.items()},
+        }
+
+    def flush(self, namespace: Optional[str] = None):
+        """Persist buffered writes of one namespace, or of all when None"""
+        if namespace is not None:
+            return self.namespace(namespace).flush()
+        for idx in list(self._indexes.values()):
+            idx.flush()
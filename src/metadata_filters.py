@@ -0,0 +1,109 @@
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+# "Type: CASH_OUT, Amount: 229133.94" as written in the fraud input rows
+TRANSACTION_RE = re.compile(r"Type:\s*([A-Z_]+),\s*Amount:\s*([0-9]+(?:\.[0-9]+)?)")
+
+# Collection prefix -> business domain ("Fraud_LLM_Input" -> "fraud")
+DOMAINS = ("fraud", "revenue", "market")
+
+
+def to_timestamp(value) -> Optional[float]:
+    """Epoch seconds for Mongo dates, Extended JSON dates or ISO strings"""
+    if isinstance(value, dict) and "$date" in value:
+        value = value["$date"]
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return None
+
+
+def extract_metadata(doc: Dict[str, Any], collection_name: str, text: str, kind: str = "input") -> Dict[str, Any]:
+    """Structured, filterable metadata for one Mongo document.
+
+    Only Pinecone-compatible values are emitted (strings, numbers, booleans
+    and lists of strings); dates become epoch seconds so range filters work.
+    """
+    metadata = {"text": text, "source": collection_name, "kind": kind}
+    # Ingested documents carry their own domain; collections are named after theirs
+    domain = str(doc.get("domain") or collection_name.split("_")[0]).lower()
+    if domain in DOMAINS:
+        metadata["domain"] = domain
+    if doc.get("agent"):
+        metadata["agent"] = str(doc["agent"])
+    if doc.get("originalFileName"):
+        metadata["file_name"] = str(doc["originalFileName"])
+    for field, key in (("uploadedAt", "uploaded_at"), ("date", "date"), ("createdAt", "created_at")):
+        ts = to_timestamp(doc.get(field))
+        if ts is not None:
+            metadata[key] = ts
+
+    transactions = TRANSACTION_RE.findall(text)
+    if transactions:
+        types = sorted({t for t, _ in transactions})
+        amounts = [float(a) for _, a in transactions]
+        metadata["transaction_types"] = types
+        metadata["max_amount"] = max(amounts)
+        metadata["min_amount"] = min(amounts)
+        if len(transactions) == 1:
+            metadata["transaction_type"] = types[0]
+            metadata["amount"] = amounts[0]
+    return metadata
+
+
+def _compare(value, op, operand):
+    # List-valued metadata matches when any element matches, as in Pinecone
+    if isinstance(value, list) and op in ("$eq", "$in"):
+        return any(_compare(v, op, operand) for v in value)
+    if isinstance(value, list) and op in ("$ne", "$nin"):
+        return all(_compare(v, op, operand) for v in value)
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if op == "$exists":
+        return (value is not None) == bool(operand)
+    if value is None or isinstance(value, (list, str)) and op in ("$gt", "$gte", "$lt", "$lte"):
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def matches_filter(metadata: Dict[str, Any], flt: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Pinecone-style metadata filter against one metadata dict"""
+    if not flt:
+        return True
+    for key, condition in flt.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, c) for c in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, c) for c in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif not _compare(metadata.get(key), "$eq", condition):
+            return False
+    return True
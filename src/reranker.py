@@ -0,0 +1,211 @@
+import math
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import List, Optional, Sequence, Tuple
+
+from src.degradation import STOPWORDS, WORD_RE
+
+RERANKER = os.getenv("RERANKER", "lexical").lower()  # none | lexical | cross-encoder
+# Candidates fetched from the index for reranking; only top_k of them are kept
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "30"))
+# Past this (from the start of the rerank call) the original vector order is
+# used instead. BM25 over 30 candidates takes a few ms; a MiniLM cross-encoder
+# on CPU needs several hundred ms for 30 full-length passages
+DEFAULT_BUDGET_MS = {"none": 0, "lexical": 150, "cross-encoder": 1000}
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS") or DEFAULT_BUDGET_MS.get(RERANKER, 150))
+RERANK_THREADS = int(os.getenv("RERANK_THREADS", "2"))
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Share of the vector similarity in the lexical score (the rest is BM25)
+RERANK_VECTOR_WEIGHT = float(os.getenv("RERANK_VECTOR_WEIGHT", "0.5"))
+RERANK_MAX_CHARS = 2000  # passage prefix the cross-encoder sees
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def lexical_scores(query: str, passages: Sequence[str], vector_scores: Sequence[float],
+                   vector_weight: float = RERANK_VECTOR_WEIGHT) -> List[float]:
+    """BM25 of the query over the candidate passages, blended with vector similarity.
+
+    BM25 statistics come from the candidates themselves, so no corpus-wide
+    index is needed; scores are scaled to [0, 1] before blending.
+    """
+    query_terms = set(_terms(query))
+    docs = [Counter(_terms(p)) for p in passages]
+    if not query_terms or not docs:
+        return list(vector_scores)
+    avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+    df = Counter(t for d in docs for t in query_terms if t in d)
+    idf = {t: math.log(1 + (len(docs) - df[t] + 0.5) / (df[t] + 0.5)) for t in df}
+    bm25 = []
+    for d in docs:
+        length = sum(d.values())
+        score = 0.0
+        for t, weight in idf.items():
+            tf = d.get(t, 0)
+            if tf:
+                score += weight * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+        bm25.append(score)
+    top = max(bm25) or 1.0
+    return [vector_weight * v + (1 - vector_weight) * b / top for v, b in zip(vector_scores, bm25)]
+
+
+class CrossEncoderScorer:
+    """Small CPU cross-encoder (sentence-transformers), loaded on first use"""
+
+    def __init__(self, model: str = RERANK_MODEL):
+        self.model_name = model
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name, device="cpu")
+                print(f"Loaded reranking model {self.model_name}")
+        return self._model
+
+    def scores(self, query: str, passages: Sequence[str]) -> List[float]:
+        pairs = [(query, p[:RERANK_MAX_CHARS]) for p in passages]
+        return [float(s) for s in self.load().predict(pairs)]
+
+
+class Reranker:
+    """Second retrieval stage: reorder the top-N index matches, keep the best few.
+
+    Scoring runs on a small thread pool and is bounded by `budget_ms`; when
+    it runs out (or fails) the matches keep their vector order, so reranking
+    can only cost latency up to the budget. At most `threads` scorings run at
+    once: when all are busy a request skips reranking instead of queueing
+    behind them, and a timed-out scoring is cancelled if it has not started.
+
+    The pool (and the cross-encoder model) are created lazily in each
+    process: a pool that ran tasks before a fork (gunicorn preload) never
+    runs anything in the forked worker.
+    """
+
+    def __init__(self, mode: str = RERANKER, budget_ms: float = RERANK_BUDGET_MS, threads: int = RERANK_THREADS,
+                 candidates: int = RERANK_CANDIDATES):
+        if mode not in ("none", "lexical", "cross-encoder"):
+            raise ValueError(f"Unknown reranker '{mode}'. Choose from: none, lexical, cross-encoder")
+        self.mode = mode
+        self.budget = budget_ms / 1000.0
+        self.candidates = candidates
+        self.threads = threads
+        self.cross_encoder = None
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(threads)
+        self.counts = {"reranked": 0, "over_budget": 0, "saturated": 0, "errors": 0}
+        self.avg_ms = 0.0
+        if mode == "cross-encoder":
+            try:
+                import sentence_transformers  # noqa: F401
+                self.cross_encoder = CrossEncoderScorer()
+            except ImportError:
+                print("Warning: RERANKER=cross-encoder needs sentence-transformers, using lexical reranking")
+                self.mode = "lexical"
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "none"
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """This process's scoring pool, created on first use after any fork"""
+        if self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool_pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="rerank")
+                    self._pool_pid = os.getpid()
+                    if self.cross_encoder is not None:
+                        # A model loaded before the fork is reused; otherwise load it
+                        # in the background so the first queries are not over budget
+                        self._pool.submit(self._calibrate)
+        return self._pool
+
+    def _calibrate(self):
+        """Load the cross-encoder and time a full-size scoring against the budget"""
+        try:
+            self.cross_encoder.load()
+            passages = ["revenue growth by region " * (RERANK_MAX_CHARS // 25)] * self.candidates
+            start = time.perf_counter()
+            self.cross_encoder.scores("which region grew fastest", passages)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"[Rerank] {self.candidates} candidates score in {elapsed:.0f}ms (budget {self.budget * 1000:.0f}ms)")
+            if elapsed > self.budget * 1000:
+                print("[Rerank] Warning: most queries will exceed the budget; raise rerank_budget_ms "
+                      "or lower rerank_candidates")
+        except Exception as e:
+            print(f"[Rerank] Could not load the cross-encoder: {e}")
+
+    def warm_up(self):
+        """Start this process's pool (and model load) ahead of the first query"""
+        if self.enabled:
+            self.pool
+
+    def _score(self, query: str, passages: List[str], vector_scores: List[float]) -> List[float]:
+        if self.cross_encoder is not None:
+            return self.cross_encoder.scores(query, passages)
+        return lexical_scores(query, passages, vector_scores)
+
+    def rerank(self, query: str, matches: Sequence, top_k: int,
+               started: Optional[float] = None) -> List[Tuple[object, Optional[float]]]:
+        """[(match, rerank score or None)] for the best `top_k` of `matches`;
+        the budget runs from `started` (a perf_counter time, default now)"""
+        matches = list(matches)
+        if not self.enabled or len(matches) <= 1:
+            return [(m, None) for m in matches[:top_k]]
+        start = time.perf_counter() if started is None else started
+        if time.perf_counter() - start >= self.budget:
+            self.counts["over_budget"] += 1
+            return [(m, None) for m in matches[:top_k]]
+        if not self._slots.acquire(blocking=False):
+            self.counts["saturated"] += 1
+            print("[Rerank] All scoring threads busy, keeping vector order")
+            return [(m, None) for m in matches[:top_k]]
+        passages = [m["metadata"].get("text", "") for m in matches]
+        try:
+            future = self.pool.submit(self._score, query, passages, [float(m["score"]) for m in matches])
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _f: self._slots.release())
+        try:
+            scores = future.result(timeout=max(0.0, start + self.budget - time.perf_counter()))
+        except TimeoutError:
+            future.cancel()
+            self.counts["over_budget"] += 1
+            print(f"[Rerank] Over the {self.budget * 1000:.0f}ms budget, keeping vector order")
+            return [(m, None) for m in matches[:top_k]]
+        except Exception as e:
+            self.counts["errors"] += 1
+            print(f"[Rerank] Failed, keeping vector order: {e}")
+            return [(m, None) for m in matches[:top_k]]
+        self.counts["reranked"] += 1
+        self.avg_ms = 0.8 * self.avg_ms + 0.2 * (time.perf_counter() - start) * 1000
+        ranked, seen = [], set()
+        for i in sorted(range(len(matches)), key=lambda i: -scores[i]):
+            # Identical passages (e.g. a document indexed twice) would waste prompt space
+            if passages[i] in seen:
+                continue
+            seen.add(passages[i])
+            ranked.append((matches[i], scores[i]))
+            if len(ranked) == top_k:
+                break
+        return ranked
+
+    def stats(self):
+        return {"mode": self.mode, **self.counts, "avg_ms": round(self.avg_ms, 2)}
+
+
+reranker = Reranker()
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# SQLite file shared by every worker process on the host; empty disables sharing
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "100000"))
+# Trim the table back to max_entries after this many writes
+EVICT_EVERY = 1000
+
+
+def cache_key(*parts) -> str:
+    return hashlib.sha1("\0".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class SharedCache:
+    """Key -> bytes cache in a SQLite file, shared across worker processes.
+
+    The database runs in WAL mode so readers in every worker proceed while
+    one of them writes. Connections are opened lazily per process (a
+    connection inherited through fork is never reused), and the oldest
+    entries are trimmed once the table grows past `max_entries`.
+    """
+
+    def __init__(self, table: str, path: str = SHARED_CACHE_PATH, max_entries: int = SHARED_CACHE_MAX_ENTRIES):
+        self.table = table
+        self.path = path
+        self.max_entries = max_entries
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.table}" '
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found = {}
+        try:
+            with self._lock:
+                conn = self._connection()
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    rows = conn.execute(
+                        f'SELECT key, value FROM "{self.table}" WHERE key IN ({",".join("?" * len(chunk))})', chunk
+                    ).fetchall()
+                    found.update(rows)
+        except sqlite3.Error as e:
+            print(f"[SharedCache] {self.table} read failed: {e}")
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]]):
+        now = time.time()
+        rows = [(key, value, now) for key, value in items]
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.executemany(f'INSERT OR REPLACE INTO "{self.table}" VALUES (?, ?, ?)', rows)
+                self._writes += len(rows)
+                if self._writes >= EVICT_EVERY:
+                    self._writes = 0
+                    conn.execute(
+                        f'DELETE FROM "{self.table}" WHERE key IN (SELECT key FROM "{self.table}" '
+                        f"ORDER BY created DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+                    )
+        except sqlite3.Error as e:
+            print(f"[SharedCache] {self.table} write failed: {e}")
+
+    def put(self, key: str, value: bytes):
+        self.put_many([(key, value)])
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def shared_cache(table: str) -> Optional[SharedCache]:
+    """A SharedCache for `table`, or None when SHARED_CACHE_PATH is unset"""
+    return SharedCache(table) if SHARED_CACHE_PATH else None
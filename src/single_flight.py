@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a user query so trivially different spellings share a key"""
+    return " ".join(str(query).lower().split()).rstrip("?!. ")
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the work; callers arriving while it is
+    still in flight wait for the same result (or exception). Nothing is kept
+    once the call finishes, so this is deduplication, not caching.
+    """
+
+    def __init__(self, name: str = "single-flight"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._calls: Dict[Hashable, _Call] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run the coroutine factory `fn` once per in-flight `key` (asyncio)"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda _t, k=key: self._tasks.pop(k, None))
+        else:
+            self.shared += 1
+            print(f"[{self.name}] Joining in-flight call for {key!r}")
+        # Shield so one waiter disconnecting does not cancel the shared work;
+        # it is cancelled only once every waiter has gone
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[key] == 1 and not task.done():
+                print(f"[{self.name}] All waiters gone, cancelling {key!r}")
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def do_sync(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run the callable `fn` once per in-flight `key` (threads)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        return {"executions": self.executions, "shared": self.shared}
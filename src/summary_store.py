@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from src.analytics_store import get_analytics_store
+from src.degradation import STOPWORDS, WORD_RE
+
+SUMMARY_COLLECTION = os.getenv("SUMMARY_COLLECTION", "Domain_Summaries")
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+SUMMARY_CACHE_SECONDS = int(os.getenv("SUMMARY_CACHE_SECONDS", "60"))
+
+# domain -> (input collection, output collection)
+DOMAIN_COLLECTIONS = {
+    "fraud": ("Fraud_LLM_Input", "Fraud_LLM_Output"),
+    "revenue": ("Revenue_LLM_Input", "Revenue_LLM_Output"),
+    "market": ("Market_LLM_Input", "Market_LLM_Output"),
+}
+
+SUMMARY_QUERY_RE = re.compile(r"\b(summary|summarize|summarise|overview|brief me|briefing|executive report|recap)\b")
+DOMAIN_QUERY_HINTS = {
+    "fraud": ("fraud", "transaction", "risk"),
+    "revenue": ("revenue", "sales", "forecast", "financial"),
+    "market": ("market", "swot", "competitor", "competition"),
+}
+# Asking about the business as a whole rather than one domain
+BUSINESS_WIDE_RE = re.compile(r"\b(business|company|everything|all domains|overall|whole)\b")
+# Words that can go with a domain-level summary request without narrowing it;
+# any other word ("summarize the Acme account") means a specific subject,
+# which retrieval answers better than a canned domain summary
+SUMMARY_FILLER = STOPWORDS | frozenset(
+    "s our us we please can could would you provide write need want quick short brief high level "
+    "latest recent current today executive report status state situation performance trend trends "
+    "highlight highlights key metric metrics insight insights finding findings data domain domains "
+    "all across whole overall business company everything".split()
+)
+
+
+def fingerprint(parts) -> str:
+    """Stable hash of the (id, text) pairs that make up a collection"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def is_summary_query(query: str) -> bool:
+    return bool(SUMMARY_QUERY_RE.search(query.lower()))
+
+
+def summary_domains(query: str):
+    """Domains a domain-level summary question asks for; empty for any other question.
+
+    "fraud overview" or "summarize the business" qualify. A question with a
+    number or another subject ("summary of transaction 15", "summarize
+    Acme's orders") does not: the stored summaries cannot answer it.
+    """
+    q = query.lower()
+    if not is_summary_query(q) or re.search(r"\d", q):
+        return []
+    hints = [h for domain_hints in DOMAIN_QUERY_HINTS.values() for h in domain_hints]
+    for word in WORD_RE.findall(SUMMARY_QUERY_RE.sub(" ", q)):
+        if word not in SUMMARY_FILLER and not any(word.startswith(h) for h in hints):
+            return []
+    domains = [d for d, domain_hints in DOMAIN_QUERY_HINTS.items() if any(h in q for h in domain_hints)]
+    if domains:
+        return domains
+    return list(DOMAIN_COLLECTIONS) if BUSINESS_WIDE_RE.search(q) else []
+
+
+def query_domains(query: str):
+    q = query.lower()
+    domains = [d for d, hints in DOMAIN_QUERY_HINTS.items() if any(h in q for h in hints)]
+    return domains or list(DOMAIN_COLLECTIONS)
+
+
+class SummaryStore:
+    """Materialized per-domain executive summaries and key metrics.
+
+    `refresh` is called after sync with a fingerprint per collection; a
+    domain is re-summarized (one LLM call) only when its fingerprint changed.
+    Results live in the SUMMARY_COLLECTION Mongo collection so every process
+    sees them, with a short in-process cache in front.
+    """
+
+    def __init__(self, db, tenant: Optional[str] = None):
+        self.db = db
+        self.tenant = tenant
+        self.collection = db[SUMMARY_COLLECTION]
+        self._cache: Dict[str, dict] = {}
+        self._cache_time = 0.0
+        self._lock = threading.Lock()
+
+    # --- generation ---
+    def _latest_output(self, domain):
+        doc = self.db[DOMAIN_COLLECTIONS[domain][1]].find_one(sort=[("date", -1)])
+        if not doc:
+            return None
+        return {k: v for k, v in doc.items() if k not in ["_id", "__v", "createdAt"]}
+
+    def _generate(self, domain, metrics, analysis):
+        # Sample of the raw inputs keeps the prompt small; metrics cover the rest
+        inputs = self.db[DOMAIN_COLLECTIONS[domain][0]].find({}, {"content": 1}).limit(3)
+        sample = "\n".join(str(d.get("content", ""))[:1500] for d in inputs)
+        prompt = (
+            f"Write a concise executive summary (max 150 words) of the {domain} data below.\n\n"
+            f"KEY METRICS: {json.dumps(metrics)}\n\n"
+            f"LATEST MODEL ANALYSIS: {json.dumps(analysis, default=str)[:3000]}\n\n"
+            f"SAMPLE INPUT DATA:\n{sample}"
+        )
+        try:
+            from litellm import completion
+            response = completion(
+                model=SUMMARY_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=300,
+                temperature=0.3
+            )
+            return response.choices[0].message.content, False
+        except Exception as e:
+            print(f"[Summaries] LLM summary for {domain} failed, using extractive summary: {e}")
+            return self._extractive(domain, metrics, analysis), True
+
+    @staticmethod
+    def _extractive(domain, metrics, analysis):
+        lines = [f"{domain.title()} summary."]
+        if metrics:
+            # Only numbers get thousands separators; None and text values are skipped
+            numbers = [(k, v) for k, v in metrics.items() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+            if numbers:
+                lines.append("Key metrics: " + ", ".join(f"{k.replace('_', ' ')} {v:,}" for k, v in numbers))
+        if analysis and isinstance(analysis.get("analysis"), dict):
+            lines.extend(str(v) for v in analysis["analysis"].values())
+        return " ".join(lines)
+
+    def refresh(self, fingerprints: Dict[str, str], force: bool = False):
+        """Re-summarize domains whose collection fingerprints changed"""
+        for domain, (input_name, output_name) in DOMAIN_COLLECTIONS.items():
+            fp = fingerprint([fingerprints.get(input_name), fingerprints.get(output_name)])
+            current = self.collection.find_one({"domain": domain}, {"fingerprint": 1, "extractive": 1})
+            # Extractive stand-ins (LLM was down) are retried on the next sync
+            if not force and current and current.get("fingerprint") == fp and not current.get("extractive"):
+                print(f"[Summaries] {domain} unchanged, keeping stored summary")
+                continue
+            try:
+                metrics = get_analytics_store(self.tenant).key_metrics(domain)
+                analysis = self._latest_output(domain)
+                summary, extractive = self._generate(domain, metrics, analysis)
+                self.collection.update_one(
+                    {"domain": domain},
+                    {"$set": {
+                        "domain": domain,
+                        "fingerprint": fp,
+                        "summary": summary,
+                        "extractive": extractive,
+                        "metrics": metrics,
+                        "analysis": json.loads(json.dumps(analysis, default=str)) if analysis else None,
+                        "updatedAt": datetime.now(timezone.utc),
+                    }},
+                    upsert=True
+                )
+                print(f"[Summaries] Refreshed {domain} summary")
+            except Exception as e:
+                print(f"[Summaries] Could not refresh {domain}: {e}")
+        self.invalidate()
+
+    # --- serving ---
+    def invalidate(self):
+        with self._lock:
+            self._cache = {}
+            self._cache_time = 0.0
+
+    def all(self) -> Dict[str, dict]:
+        with self._lock:
+            if not self._cache or time.time() - self._cache_time > SUMMARY_CACHE_SECONDS:
+                try:
+                    docs = self.collection.find({}, {"_id": 0})
+                    self._cache = {d["domain"]: d for d in docs}
+                    self._cache_time = time.time()
+                except Exception as e:
+                    print(f"[Summaries] Could not load summaries: {e}")
+            return dict(self._cache)
+
+    def get(self, domain: str) -> Optional[dict]:
+        return self.all().get(domain)
+
+    def answer(self, query: str) -> Optional[str]:
+        """Serve a domain-level summary question from the stored summaries"""
+        domains = summary_domains(query)
+        if not domains:
+            return None
+        summaries = self.all()
+        parts = [f"**{d.title()}**: {summaries[d]['summary']}" for d in domains if d in summaries]
+        return "\n\n".join(parts) if parts else None
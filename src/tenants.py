@@ -0,0 +1,65 @@
+import contextvars
+import os
+import re
+from typing import List, Optional
+
+# The database the single-tenant deployment has always used
+DB_NAME = os.getenv("DB_NAME", "sample_db")
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+# Comma-separated tenant ids; empty means single-tenant (everything is DEFAULT_TENANT)
+TENANTS = [t.strip() for t in os.getenv("TENANTS", "").split(",") if t.strip()]
+# Optional on requests; the tenant itself comes from the caller's API key
+TENANT_HEADER = os.getenv("TENANT_HEADER", "X-Tenant-Id")
+# Mongo database per tenant; the default tenant keeps DB_NAME
+TENANT_DB_TEMPLATE = os.getenv("TENANT_DB_TEMPLATE", "{tenant}_db")
+
+TENANT_ID_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,47}$")
+
+# Tenant of the request being served; asyncio tasks and to_thread calls inherit it
+current_tenant = contextvars.ContextVar("current_tenant", default=DEFAULT_TENANT)
+
+
+class UnknownTenant(Exception):
+    """Raised for a tenant id that is not configured"""
+
+
+class TenantMismatch(Exception):
+    """Raised when a request asks for a tenant its credentials are not bound to"""
+
+
+def all_tenants() -> List[str]:
+    return list(dict.fromkeys([DEFAULT_TENANT] + TENANTS)) if TENANTS else [DEFAULT_TENANT]
+
+
+def validate_tenant(tenant_id: Optional[str]) -> str:
+    """Normalized configured tenant id; missing means the default tenant"""
+    if not tenant_id:
+        return DEFAULT_TENANT
+    tenant_id = tenant_id.strip().lower()
+    if not TENANT_ID_RE.match(tenant_id) or tenant_id not in all_tenants():
+        raise UnknownTenant(f"Unknown tenant '{tenant_id}'")
+    return tenant_id
+
+
+def resolve_tenant(bound_tenant: Optional[str], requested: Optional[str] = None) -> str:
+    """Tenant of a request: the one its API key is bound to (the default
+    tenant for unbound keys and anonymous callers). A tenant header is only
+    checked against it, never trusted on its own."""
+    tenant = validate_tenant(bound_tenant)
+    if requested and requested.strip().lower() != tenant:
+        raise TenantMismatch(f"Credentials are not valid for tenant '{requested.strip()}'")
+    return tenant
+
+
+def tenant_db_name(tenant: Optional[str] = None) -> str:
+    tenant = tenant or current_tenant.get()
+    return DB_NAME if tenant == DEFAULT_TENANT else TENANT_DB_TEMPLATE.format(tenant=tenant)
+
+
+def tenant_path(path: str, tenant: Optional[str] = None) -> str:
+    """Per-tenant variant of a local file path ("analytics.db" -> "analytics.acme.db")"""
+    tenant = tenant or current_tenant.get()
+    if tenant == DEFAULT_TENANT:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{tenant}{ext}"
@@ -5,8 +5,12 @@ Configuration validation script for CrewAI YAML files
 
 import yaml
 import os
+import sys
 from typing import Dict, Any, List
 
+# Also runnable as `python src/validate_config.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 class ConfigValidator:
     def __init__(self):
         self.config_dir = os.path.join(os.path.dirname(__file__), 'config')
@@ -169,6 +173,24 @@ class ConfigValidator:
         
         return len(self.errors) == 0
     
+    def validate_schema(self) -> bool:
+        """Validate every config file with the schema the server loads at startup"""
+        print("\n=== Validating Schema (agents, tasks, models, runtime) ===")
+
+        from src.app_config import ConfigError, config_paths, load_config
+        try:
+            config = load_config()
+        except ConfigError as e:
+            for line in str(e).splitlines():
+                self.errors.append(f"Schema: {line}")
+            return False
+
+        for section, path in config_paths().items():
+            print(f"  ✓ {section}: {path}")
+        print(f"  ✓ chat agent: {config.chat_task.agent}")
+        print(f"  ✓ model tiers: {', '.join(config.models.tiers)}")
+        return True
+
     def run_all_validations(self) -> bool:
         """Run all validation checks"""
         print("🔍 CrewAI Configuration Validator\n")
@@ -177,7 +199,8 @@ class ConfigValidator:
             self.validate_yaml_syntax,
             self.validate_agents_yaml,
             self.validate_tasks_yaml,
-            self.validate_config_consistency
+            self.validate_config_consistency,
+            self.validate_schema
         ]
         
         all_passed = True
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Cached Serper web search used as the chat fallback.
+
+Results are cached per tenant and normalized query: fresh entries (WEB_CACHE_TTL_SECONDS)
+are served directly, stale ones (up to WEB_CACHE_STALE_SECONDS more) are
+served immediately while a background refresh runs, and only misses block on
+the API. With WEB_INDEX=true every fetched result is also embedded into the
+tenant's web namespace of the vector index, so a later similar question is answered
+from there without searching again.
+
+For local testing, run a stub Serper endpoint and point SERPER_API_URL at it:
+    python -m src.web_search --stub-server 8765
+    SERPER_API_URL=http://127.0.0.1:8765/search SERPER_API_KEY=test ...
+"""
+
+import argparse
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import requests
+from dotenv import load_dotenv
+
+from src.single_flight import SingleFlight, normalize_query
+from src.tenants import DEFAULT_TENANT, current_tenant
+
+load_dotenv()
+
+SERPER_API_KEY = os.getenv("SERPER_API_KEY")
+SERPER_API_URL = os.getenv("SERPER_API_URL", "https://google.serper.dev/search")
+SERPER_TIMEOUT_SECONDS = float(os.getenv("SERPER_TIMEOUT_SECONDS", "10"))
+WEB_RESULTS = 3
+WEB_CACHE_TTL_SECONDS = float(os.getenv("WEB_CACHE_TTL_SECONDS", "3600"))
+WEB_CACHE_STALE_SECONDS = float(os.getenv("WEB_CACHE_STALE_SECONDS", "86400"))
+WEB_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("WEB_CACHE_NEGATIVE_TTL_SECONDS", "60"))
+WEB_CACHE_SIZE = int(os.getenv("WEB_CACHE_SIZE", "1000"))
+# Embed fetched results into each tenant's web namespace and look there first
+WEB_INDEX = os.getenv("WEB_INDEX", "false").lower() == "true"
+WEB_NAMESPACE = os.getenv("WEB_NAMESPACE", "web")
+WEB_INDEX_MIN_SCORE = float(os.getenv("WEB_INDEX_MIN_SCORE", "0.88"))
+
+
+def web_namespace(tenant: Optional[str] = None) -> str:
+    # Like index generations, other tenants' namespaces carry the tenant id
+    tenant = tenant or current_tenant.get()
+    return WEB_NAMESPACE if tenant == DEFAULT_TENANT else f"{tenant}-{WEB_NAMESPACE}"
+
+
+def serper_search(query: str) -> Optional[List[Dict]]:
+    """Top organic results ({title, snippet, link}) from Serper, or None"""
+    if not SERPER_API_KEY:
+        return None
+    headers = {"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"}
+    try:
+        resp = requests.post(SERPER_API_URL, headers=headers, json={"q": query}, timeout=SERPER_TIMEOUT_SECONDS)
+        resp.raise_for_status()
+        results = resp.json().get("organic", [])[:WEB_RESULTS]
+        return [{k: r.get(k, "") for k in ("title", "snippet", "link")} for r in results] or None
+    except Exception as e:
+        print(f"Serper web search error: {e}")
+        return None
+
+
+def format_results(results: List[Dict]) -> str:
+    return "\n".join(f"{r['title']}: {r['snippet']} ({r['link']})" for r in results)
+
+
+class WebSearchCache:
+    """TTL cache with stale-while-revalidate in front of a search function.
+    Entries are per tenant, so one tenant's searches are never shown to another."""
+
+    def __init__(self, fetch, ttl: float = WEB_CACHE_TTL_SECONDS, stale: float = WEB_CACHE_STALE_SECONDS,
+                 negative_ttl: float = WEB_CACHE_NEGATIVE_TTL_SECONDS, size: int = WEB_CACHE_SIZE):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale = stale
+        self.negative_ttl = negative_ttl
+        self.size = size
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # (tenant, query) -> (fetched at, results)
+        self._lock = threading.Lock()
+        self._flight = SingleFlight("web-search")
+        self.counts = {"fresh": 0, "stale": 0, "miss": 0}
+
+    def _load(self, key: tuple, query: str):
+        results = self._flight.do_sync(key, lambda: self.fetch(query))
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time(), results)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return results
+
+    def get(self, query: str) -> Optional[List[Dict]]:
+        key = (current_tenant.get(), normalize_query(query))
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            ttl = self.ttl if entry[1] else self.negative_ttl
+            if age <= ttl:
+                self.counts["fresh"] += 1
+                return entry[1]
+            if entry[1] and age <= ttl + self.stale:
+                self.counts["stale"] += 1
+                # The refresh runs in the caller's context, so it indexes into the same tenant
+                context = contextvars.copy_context()
+                threading.Thread(target=context.run, args=(self._load, key, query), daemon=True).start()
+                return entry[1]
+        self.counts["miss"] += 1
+        return self._load(key, query)
+
+    def stats(self):
+        return {**self.counts, "entries": len(self._entries)}
+
+
+def _index_results(results: List[Dict]):
+    """Embed results into the tenant's web namespace so vector retrieval finds them later"""
+    from src.vector_db_pipeline import get_embeddings, index
+    texts = [f"{r['title']}: {r['snippet']} ({r['link']})" for r in results]
+    vectors = get_embeddings(texts)
+    records = [
+        {
+            "id": hashlib.sha1(r["link"].encode("utf-8")).hexdigest(),
+            "values": vector,
+            "metadata": {"text": text, "source": "web", "kind": "web", "link": r["link"],
+                         "title": r["title"], "fetched_at": time.time()},
+        }
+        for r, text, vector in zip(results, texts, vectors) if vector is not None
+    ]
+    if records:
+        index.upsert(vectors=records, namespace=web_namespace())
+        if hasattr(index, "flush"):
+            index.flush(web_namespace())
+
+
+def _fetch_and_index(query: str) -> Optional[List[Dict]]:
+    results = serper_search(query)
+    if results and WEB_INDEX:
+        try:
+            _index_results(results)
+        except Exception as e:
+            print(f"[Web] Could not index web results: {e}")
+    return results
+
+
+web_cache = WebSearchCache(_fetch_and_index)
+
+
+def search_web_index(query: str, query_vector=None) -> Optional[str]:
+    """Previously fetched web results similar enough to answer `query`"""
+    from src.vector_db_pipeline import get_embedding, index
+    try:
+        vector = query_vector if query_vector is not None else get_embedding(query)
+        if vector is None:
+            return None
+        matches = index.query(vector=vector, top_k=WEB_RESULTS, include_metadata=True,
+                              namespace=web_namespace()).get("matches", [])
+        texts = [m["metadata"]["text"] for m in matches if m["score"] >= WEB_INDEX_MIN_SCORE]
+        return "\n".join(texts) if texts else None
+    except Exception as e:
+        print(f"[Web] Web index lookup failed: {e}")
+        return None
+
+
+def web_search(query: str, query_vector=None) -> Optional[str]:
+    """Web context for `query`: web index, then cache, then the Serper API"""
+    if WEB_INDEX:
+        indexed = search_web_index(query, query_vector)
+        if indexed:
+            return indexed
+    results = web_cache.get(query)
+    return format_results(results) if results else None
+
+
+class _StubSerperHandler(BaseHTTPRequestHandler):
+    """Answers like Serper's /search with canned results echoing the query"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        q = body.get("q", "")
+        payload = {"organic": [
+            {"title": f"Result {i} for {q}", "snippet": f"Stub snippet {i} about {q}.",
+             "link": f"https://example.com/{i}?q={q.replace(' ', '+')}"}
+            for i in range(1, WEB_RESULTS + 1)
+        ]}
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        print(f"[Stub Serper] {fmt % args}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached web search")
+    parser.add_argument("--stub-server", type=int, metavar="PORT", help="serve a stub Serper API on PORT")
+    parser.add_argument("query", nargs="?", help="run one cached search and print it")
+    args = parser.parse_args()
+    if args.stub_server:
+        print(f"Stub Serper API on http://127.0.0.1:{args.stub_server}/search")
+        ThreadingHTTPServer(("127.0.0.1", args.stub_server), _StubSerperHandler).serve_forever()
+    elif args.query:
+        print(web_search(args.query))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
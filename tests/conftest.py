@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# Module-level settings are read at import time, so point every store at a
+# scratch directory and the self-hosted index before any src module loads
+_scratch = tempfile.mkdtemp(prefix="bora-tests-")
+os.environ.setdefault("VECTOR_STORE", "local")
+os.environ.setdefault("EMBEDDING_BACKEND", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("LOCAL_INDEX_DIR", os.path.join(_scratch, "local_index"))
+os.environ.setdefault("ANALYTICS_DB_PATH", os.path.join(_scratch, "analytics.db"))
+os.environ.setdefault("SHARED_CACHE_PATH", "")
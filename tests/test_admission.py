@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from src.admission import (
+    BACKGROUND_PRIORITY, HIGH_PRIORITY, NORMAL_PRIORITY, Overloaded, PriorityLimiter, RateLimiter, priority_for,
+)
+from src.tenants import current_tenant
+
+
+def test_rate_limiter_allows_the_burst_then_asks_to_wait():
+    limiter = RateLimiter(per_minute=60, burst=3)
+    assert [limiter.check("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.check("a") == pytest.approx(1.0, abs=0.05)
+    # Buckets are per client
+    assert limiter.check("b") == 0.0
+
+
+def test_rate_limiter_charges_batch_cost_and_evicts_old_clients():
+    limiter = RateLimiter(per_minute=60, burst=5, max_clients=2)
+    assert limiter.check("a", cost=5) == 0.0
+    assert limiter.check("a", cost=2) > 0
+    limiter.check("b")
+    limiter.check("c")
+    assert list(limiter._buckets) == ["b", "c"]
+
+
+def test_rate_limiter_disabled_with_zero_rate():
+    limiter = RateLimiter(per_minute=0, burst=1)
+    assert all(limiter.check("a") == 0.0 for _ in range(10))
+
+
+def test_only_authenticated_clients_get_priority(monkeypatch):
+    monkeypatch.setattr("src.admission.PRIORITY_CLIENTS", {"dashboard"})
+    assert priority_for("dashboard", True) == HIGH_PRIORITY
+    assert priority_for("dashboard", False) == NORMAL_PRIORITY
+    assert priority_for("someone", True) == NORMAL_PRIORITY
+
+
+async def _serve_in_order(waiters):
+    """Hold the only slot, queue `waiters` [(name, tenant, priority)], return grant order"""
+    limiter = PriorityLimiter("test", 1, max_wait=5)
+    order = []
+    await limiter.acquire(NORMAL_PRIORITY)
+
+    async def waiter(name, tenant, priority):
+        current_tenant.set(tenant)
+        async with limiter.slot(priority):
+            order.append(name)
+
+    tasks = []
+    for waiter_args in waiters:
+        tasks.append(asyncio.ensure_future(waiter(*waiter_args)))
+        await asyncio.sleep(0)  # enqueue in this order
+    limiter.release()
+    await asyncio.gather(*tasks)
+    assert limiter.active == 0
+    return order
+
+
+def test_priority_limiter_serves_high_priority_first():
+    order = asyncio.run(_serve_in_order([
+        ("normal", "default", NORMAL_PRIORITY),
+        ("high", "default", HIGH_PRIORITY),
+    ]))
+    assert order == ["high", "normal"]
+
+
+def test_priority_limiter_interleaves_tenants_fairly():
+    order = asyncio.run(_serve_in_order(
+        [(f"a{i}", "a", NORMAL_PRIORITY) for i in range(3)] + [("b0", "b", NORMAL_PRIORITY)]
+    ))
+    assert order.index("b0") <= 1
+
+
+def test_priority_limiter_sheds_when_the_wait_is_too_long():
+    async def run():
+        limiter = PriorityLimiter("test", 1, max_wait=0.05)
+        await limiter.acquire()
+        with pytest.raises(Overloaded):
+            await limiter.acquire()
+        limiter.release()
+        return limiter.stats()
+
+    stats = asyncio.run(run())
+    assert stats["shed"] == 1
+    assert stats["active"] == 0
+
+
+def test_resize_hands_new_slots_to_waiters():
+    async def run():
+        limiter = PriorityLimiter("test", 1, max_wait=5)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.resize(2)
+        await asyncio.wait_for(waiter, 1)
+        return limiter.active
+
+    assert asyncio.run(run()) == 2
+
+
+def test_sync_work_is_served_after_every_request():
+    order = asyncio.run(_serve_in_order([
+        ("sync", "default", BACKGROUND_PRIORITY),
+        ("normal", "default", NORMAL_PRIORITY),
+        ("high", "default", HIGH_PRIORITY),
+    ]))
+    assert order == ["high", "normal", "sync"]
+
+
+def test_sync_waits_past_the_request_deadline():
+    async def run():
+        limiter = PriorityLimiter("test", 1, max_wait=0.05)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire(BACKGROUND_PRIORITY, max_wait=5))
+        await asyncio.sleep(0.1)
+        limiter.release()
+        await waiter
+        limiter.release()
+        return limiter.stats()
+
+    assert asyncio.run(run())["shed"] == 0
+
+
+def test_queued_sync_work_does_not_shed_requests():
+    async def run():
+        limiter = PriorityLimiter("test", 1, max_wait=1)
+        limiter.avg_service = 0.6
+        await limiter.acquire()
+        syncs = [asyncio.ensure_future(limiter.acquire(BACKGROUND_PRIORITY, max_wait=5)) for _ in range(5)]
+        await asyncio.sleep(0)
+        estimate = limiter.estimated_wait(NORMAL_PRIORITY)
+        for _ in syncs + [None]:
+            limiter.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*syncs)
+        return estimate
+
+    assert asyncio.run(run()) == pytest.approx(0.6)
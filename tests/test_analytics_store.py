@@ -0,0 +1,73 @@
+import pytest
+
+from src.analytics_store import AnalyticsStore
+
+FRAUD_ROWS = [("CASH_OUT", 50000), ("CASH_OUT", 150000), ("CASH_OUT", 250000), ("TRANSFER", 300000), ("PAYMENT", 10)]
+REVENUE_TABLE = "region\tproduct_name\tsales\nNorth\tWidget\t100\nSouth\tGadget\t300\nNorth\tGadget\t50\nEast\tWidget\t120"
+
+
+@pytest.fixture
+def store():
+    store = AnalyticsStore(":memory:")
+    store.ingest("fraud", "fraud-1", "\n".join(
+        f"Transaction {i}: Type: {kind}, Amount: {amount}" for i, (kind, amount) in enumerate(FRAUD_ROWS)
+    ), "Fraud_LLM_Input")
+    store.ingest("revenue", "revenue-1", REVENUE_TABLE, "Revenue_LLM_Input")
+    return store
+
+
+def test_count_keeps_the_amount_comparison(store):
+    result = store.answer("how many CASH_OUT transactions over $100k")
+    assert result["params"] == ["CASH_OUT", 100000.0]
+    assert result["rows"] == [[2]]
+
+
+def test_comparison_without_a_numeric_column_is_left_to_retrieval():
+    store = AnalyticsStore(":memory:")
+    store.ingest("revenue", "r", "region\tcustomer\nNorth\tAcme\nSouth\tGlobex")
+    assert store.plan("how many customers over 100") is None
+    assert store.plan("how many customers") is not None
+
+
+def test_superlative_over_a_group_names_the_group(store):
+    result = store.answer("which region has the highest sales")
+    assert result["rows"] == [["South", 300.0]]
+    assert "South" in result["summary"]
+    assert store.answer("which region has the lowest sales")["rows"] == [["East", 120.0]]
+    assert store.answer("which type has the most transactions")["rows"] == [["CASH_OUT", 3]]
+
+
+def test_rankings_and_group_totals(store):
+    assert store.answer("top 2 products by sales")["rows"] == [["Gadget", 350.0], ["Widget", 220.0]]
+    assert [row[0] for row in store.answer("total sales by region")["rows"]] == ["South", "North", "East"]
+
+
+def test_plain_aggregates_and_value_filters(store):
+    assert store.answer("what is the highest sales")["rows"] == [[300.0]]
+    assert store.answer("average amount of transfers")["rows"] == [[300000.0]]
+    assert store.answer("how many payments")["rows"] == [[1]]
+
+
+@pytest.mark.parametrize("query", ["top fraud risks", "fraud overall", "total fraud risk", "tell me about sales"])
+def test_vague_questions_are_not_aggregates(store, query):
+    assert store.plan(query) is None
+
+
+def test_retain_drops_rows_of_deleted_documents(store):
+    store.ingest("fraud", "fraud-2", "Transaction 9: Type: DEBIT, Amount: 5", "Fraud_LLM_Input")
+    assert store.retain("Fraud_LLM_Input", ["fraud-2"]) == len(FRAUD_ROWS)
+    assert store.answer("how many transactions")["rows"] == [[1]]
+    # Other sources are untouched
+    assert store.answer("total sales")["rows"] == [[570.0]]
+
+
+def test_another_workers_sync_invalidates_the_caches(tmp_path):
+    path = str(tmp_path / "analytics.db")
+    server, sync = AnalyticsStore(path), AnalyticsStore(path)
+    sync.ingest("revenue", "r1", "region\tsales\nNorth\t100\nSouth\t300")
+    assert server.answer("total sales for North")["rows"] == [[100.0]]
+
+    # A new value and a new column committed through the other connection
+    sync.ingest("revenue", "r2", "region\tsales\tunits\nWest\t70\t7")
+    assert server.answer("total sales for West")["rows"] == [[70.0]]
+    assert server.answer("total units")["rows"] == [[7.0]]
@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+
+import src.main as main
+
+
+def test_oversized_batch_is_rejected_with_413():
+    client = TestClient(main.app)
+    queries = [{"query": f"question {i}"} for i in range(main.CHAT_BATCH_MAX_ITEMS + 1)]
+    response = client.post("/chat/batch", json={"queries": queries})
+    assert response.status_code == 413
+    assert str(main.CHAT_BATCH_MAX_ITEMS) in response.json()["detail"]
+
+
+def test_batch_within_the_limit_is_answered_per_item(monkeypatch):
+    async def fake_run_batch(items):
+        return {"results": [{"response": item.query} for item in items]}
+
+    monkeypatch.setattr(main, "run_batch", fake_run_batch)
+    monkeypatch.setattr(main.rate_limiter, "rate", 0)
+    client = TestClient(main.app)
+    response = client.post("/chat/batch", json={"queries": [{"query": "a"}, {"query": "b"}]})
+    assert response.status_code == 200
+    assert [r["response"] for r in response.json()["results"]] == ["a", "b"]
@@ -0,0 +1,95 @@
+import asyncio
+
+import src.main as main
+from src.conversation_memory import ConversationMemory, InMemorySessionStore, MongoSessionStore
+from src.degradation import CircuitBreaker
+
+
+def memory_with(max_turns=3, token_budget=10_000):
+    memory = ConversationMemory(InMemorySessionStore(), max_turns=max_turns, token_budget=token_budget)
+    memory._summarize = lambda summary, turns: (summary + " " + " ".join(t["user"] for t in turns)).strip()
+    return memory
+
+
+def test_record_only_appends_and_fold_summarizes_the_overflow():
+    memory = memory_with()
+    needs_fold = [memory.record("s", f"q{i}", f"a{i}") for i in range(5)]
+    assert needs_fold == [False, False, False, True, True]
+
+    session = memory.get("s")
+    assert len(session["turns"]) == 5 and session["summary"] == ""
+    # Until the fold lands, only the newest max_turns go to the LLM
+    assert [m["content"] for m in memory.history_messages(session) if m["role"] == "user"] == ["q2", "q3", "q4"]
+
+    memory.fold("s")
+    session = memory.get("s")
+    assert [t["user"] for t in session["turns"]] == ["q2", "q3", "q4"]
+    assert session["summary"] == "q0 q1" and session["folds"] == 1
+
+
+def test_a_stale_fold_does_not_overwrite_a_newer_one():
+    memory = memory_with(max_turns=1)
+    memory.record("s", "q0", "a0")
+    memory.record("s", "q1", "a1")
+    stale = memory.get("s")
+    memory.fold("s")
+    assert not memory.store.fold("s", stale["turns"][:1], "stale summary", stale["folds"])
+    assert memory.get("s")["summary"] == "q0"
+
+
+def test_summary_respects_the_open_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    memory = ConversationMemory(InMemorySessionStore(), max_turns=1, breaker=breaker)
+    memory.record("s", "first question", "a0")
+    memory.record("s", "second question", "a1")
+    memory.fold("s")
+    # No LLM call while open: the truncation fallback is used instead
+    assert memory.get("s")["summary"] == "first question"
+
+
+def test_fold_runs_in_the_background_at_background_priority(monkeypatch):
+    memory = memory_with(max_turns=1)
+    memory.record("s", "q0", "a0")
+    memory.record("s", "q1", "a1")
+    priorities = []
+    original = main.llm_limiter.run_in_thread
+
+    async def spy(fn, *args, priority=None, max_wait=None):
+        priorities.append(priority)
+        return await original(fn, *args, priority=priority, max_wait=max_wait)
+
+    monkeypatch.setattr(main.llm_limiter, "run_in_thread", spy)
+    asyncio.run(main.fold_session(memory, "s"))
+    assert priorities == [main.BACKGROUND_PRIORITY]
+    assert memory.get("s")["summary"] == "q0"
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.calls = []
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def find_one_and_update(self, filter, update, **kwargs):
+        self.calls.append((filter, update))
+        return {"session": {"turns": update["$push"]["session.turns"]["$each"], "summary": "", "folds": 0}}
+
+    def update_one(self, filter, update, **kwargs):
+        self.calls.append((filter, update))
+        return type("Result", (), {"matched_count": 1})()
+
+
+def test_mongo_store_updates_sessions_atomically():
+    collection = RecordingCollection()
+    store = MongoSessionStore({"sessions": collection}, "sessions")
+    turn = {"user": "q", "assistant": "a", "at": 1.0}
+    store.append("s", turn, None, keep=30)
+    store.fold("s", [turn], "summary", folds=2)
+
+    (_, append), (fold_filter, fold) = collection.calls
+    assert append["$push"]["session.turns"] == {"$each": [turn], "$slice": -30}
+    assert "session" not in append.get("$set", {})
+    assert fold_filter == {"session_id": "s", "session.folds": 2}
+    assert fold["$pull"] == {"session.turns": {"$in": [turn]}} and fold["$inc"] == {"session.folds": 1}
@@ -0,0 +1,44 @@
+import pytest
+
+from src.answer_quality import FallbackGate
+
+CONFIG = {
+    "patterns": ["I don't know", "not sure"],
+    "retrieval_scores": {"openai": {"low": 0.70, "high": 0.85}, "local": {"low": 0.25, "high": 0.50}},
+    "pre_generation_threshold": 0.9,
+    "pattern_weight": 0.4,
+    "retrieval_weight": 0.6,
+    "fallback_threshold": 0.5,
+}
+
+
+def test_retrieval_risk_uses_the_backend_calibration():
+    assert FallbackGate(CONFIG, "openai").retrieval_risk([{"score": 0.5}]) == 1.0
+    assert FallbackGate(CONFIG, "local").retrieval_risk([{"score": 0.5}]) == 0.0
+    assert FallbackGate(CONFIG, "openai").retrieval_risk([{"score": 0.775}]) == pytest.approx(0.5)
+
+
+def test_retrieval_risk_without_matches():
+    gate = FallbackGate(CONFIG, "openai")
+    assert gate.retrieval_risk([]) == 1.0
+    assert gate.retrieval_risk(None, retrieved=False) == gate.config["unknown_retrieval_risk"]
+
+
+def test_search_first_only_for_very_weak_retrieval():
+    gate = FallbackGate(CONFIG, "openai")
+    assert gate.search_first(1.0, "q")
+    assert not gate.search_first(0.5, "q")
+
+
+def test_decide_combines_uncertainty_phrase_and_risk():
+    gate = FallbackGate(CONFIG, "openai")
+    # Typographic apostrophes still match
+    assert gate.decide("I don’t know the Q3 numbers.", 0.2, "q")
+    assert not gate.decide("Revenue grew 12% in Q3.", 0.2, "q")
+    assert gate.decide("Revenue grew 12% in Q3.", 0.9, "q")
+    assert gate.stats()["post_generation"] == 2
+
+
+def test_inverted_calibration_is_rejected():
+    with pytest.raises(ValueError):
+        FallbackGate({"retrieval_scores": {"openai": {"low": 0.9, "high": 0.8}}}, "openai")
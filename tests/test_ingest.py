@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult
+
+import src.ingest as ingest
+from src.tenants import UnknownTenant
+
+
+class FakeCollection:
+    """Stores ReplaceOne writes; batches listed in `fail` fail once each"""
+
+    def __init__(self, fail=(), drop=()):
+        self.docs = {}
+        self.calls = 0
+        self.fail = set(fail)
+        self.drop = set(drop)
+
+    def bulk_write(self, writes, ordered=True):
+        call = self.calls
+        self.calls += 1
+        if call in self.fail:
+            self.fail.discard(call)
+            raise BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "boom"}], "nInserted": 0})
+        kept = writes[:-1] if call in self.drop else writes
+        matched = sum(w._filter["_id"] in self.docs for w in kept)
+        for w in kept:
+            self.docs[w._filter["_id"]] = w._doc
+        return BulkWriteResult({"nMatched": matched, "nUpserted": len(kept) - matched, "upserted": []}, True)
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    store = {}
+    monkeypatch.setattr(ingest, "tenant_db", lambda tenant: {ingest.INGEST_COLLECTION: store["collection"]})
+    monkeypatch.setattr(ingest, "embedding_cache", None)
+
+    def use(coll):
+        store["collection"] = coll
+        return coll
+    return use
+
+
+def write_jsonl(path, n):
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"_id": f"doc{i}", "text": f"document number {i}"}) + "\n")
+    return str(path)
+
+
+def test_failed_batch_is_not_checkpointed_and_resumes(tmp_path, collection):
+    path = write_jsonl(tmp_path / "docs.jsonl", 10)
+    checkpoint = str(tmp_path / "checkpoint.json")
+    coll = collection(FakeCollection(fail={1}))
+
+    stats = ingest.ingest_files([path], workers=1, batch_size=4, checkpoint_path=checkpoint, sync=False)
+    assert stats.failed == 1 and stats.docs == 6
+    with open(checkpoint) as f:
+        state = json.load(f)["files"][path]
+    assert sorted(state["done"]) == [0, 2] and not state["complete"]
+
+    stats = ingest.ingest_files([path], workers=1, batch_size=4, checkpoint_path=checkpoint, sync=False)
+    assert stats.failed == 0 and stats.skipped == 2 and stats.docs == 4
+    assert len(coll.docs) == 10
+    with open(checkpoint) as f:
+        assert json.load(f)["files"][path]["complete"]
+
+
+def test_partial_bulk_write_is_retried(tmp_path, collection):
+    path = write_jsonl(tmp_path / "docs.jsonl", 3)
+    collection(FakeCollection(drop={0}))
+    assert ingest.ingest_batch(path, 0, list(ingest.read_documents(path)), "default", "input",
+                               ingest.IngestStats()) is False
+
+
+def test_ids_come_from_the_relative_path(tmp_path, collection, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("a")
+    os.makedirs("b")
+    paths = [write_jsonl(os.path.join(folder, "docs.jsonl"), 2) for folder in ("a", "b")]
+    coll = collection(FakeCollection())
+    ingest.ingest_files(paths, workers=1, checkpoint_path="", sync=False)
+    assert sorted(coll.docs) == ["a/docs.jsonl:doc0", "a/docs.jsonl:doc1", "b/docs.jsonl:doc0", "b/docs.jsonl:doc1"]
+
+
+def test_unknown_tenant_is_rejected(tmp_path, collection):
+    with pytest.raises(UnknownTenant):
+        ingest.ingest_files([], tenant="no-such-tenant", checkpoint_path="", sync=False)
@@ -0,0 +1,34 @@
+from src.intent_router import BUSINESS_DATA, GENERAL, IDENTITY, SMALL_TALK, IntentRouter, identity_templates
+
+TEMPLATES = identity_templates(
+    "If the user asks about your name, say you are Bora. "
+    "If the user asks who built you, say you were built by the Bora team."
+)
+
+
+def route(query):
+    return IntentRouter(TEMPLATES).route(query)
+
+
+def test_small_talk_must_be_the_whole_message():
+    assert route("hi").intent == SMALL_TALK
+    assert route("Thanks a lot!").intent == SMALL_TALK
+    assert route("hello there, thanks").intent == SMALL_TALK
+    assert route("hi, can you explain how photosynthesis works").intent == GENERAL
+
+
+def test_business_hints_win_over_identity_and_small_talk():
+    assert route("thanks, what are the total sales by region?").intent == BUSINESS_DATA
+    assert route("who are you and what market data do you have").intent == BUSINESS_DATA
+    assert route("show cash_out transactions").intent == BUSINESS_DATA
+
+
+def test_identity_questions_get_the_canned_answer():
+    result = route("what is your name?")
+    assert result.intent == IDENTITY
+    assert "Bora" in result.answer
+    assert "built by the Bora team" in route("who built you").answer
+
+
+def test_unmatched_queries_fall_back_to_general_without_embeddings():
+    assert route("explain the difference between precision and recall").intent == GENERAL
@@ -0,0 +1,139 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.local_index import LocalIndex, LocalIndexSet
+
+
+def clustered(n, dim, n_queries, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(16, dim))
+    data = centers[rng.integers(16, size=n)] + 0.5 * rng.normal(size=(n, dim))
+    queries = data[rng.integers(n, size=n_queries)] + 0.1 * rng.normal(size=(n_queries, dim))
+    return data.astype(np.float32), queries.astype(np.float32)
+
+
+def records(data, start=0):
+    return [{"id": str(start + i), "values": row.tolist(), "metadata": {"row": start + i}} for i, row in enumerate(data)]
+
+
+@pytest.mark.parametrize("ann", ["none", "ivf"])
+def test_quantized_search_recall(tmp_path, ann):
+    data, queries = clustered(3000, 32, 40)
+    idx = LocalIndex(str(tmp_path), 32, quantization="int8", ann=ann)
+    idx.upsert(records(data))
+    idx.flush()
+    assert idx.measure_recall(queries, k=10) >= 0.9
+    footprint = idx.memory_footprint()
+    assert footprint["scan_bytes"] * 4 == footprint["float_bytes"]
+
+
+def test_pending_upserts_are_flushed_in_bounded_chunks(tmp_path):
+    data, _ = clustered(250, 8, 1)
+    idx = LocalIndex(str(tmp_path), 8, quantization="none", flush_batch=100)
+    for start in range(0, 250, 50):
+        idx.upsert(records(data[start:start + 50], start))
+        assert len(idx._pending) < 100
+    assert idx.count() == 200
+    idx.flush()
+    assert idx.count() == 250
+
+
+def test_queries_and_stats_never_write(tmp_path):
+    data, queries = clustered(50, 8, 1)
+    indexes = LocalIndexSet(str(tmp_path), 8, quantization="none")
+    indexes.upsert(records(data), namespace="gen-1")
+    assert indexes.describe_index_stats()["namespaces"]["gen-1"]["vector_count"] == 0
+    indexes.flush("gen-1")
+    snapshot = os.path.join(str(tmp_path), "namespaces", "gen-1", "meta.json")
+    written = os.stat(snapshot).st_mtime_ns
+
+    # Writes buffered in a namespace being built stay out of the live one's stats
+    indexes.upsert(records(data[:5], 1000), namespace="gen-2")
+    stats = indexes.describe_index_stats()
+    assert stats["namespaces"]["gen-1"]["vector_count"] == 50
+    assert stats["namespaces"]["gen-2"]["vector_count"] == 0
+    matches = indexes.query(queries[0].tolist(), top_k=3, namespace="gen-1")["matches"]
+    assert len(matches) == 3
+    assert os.stat(snapshot).st_mtime_ns == written
+
+
+def test_another_process_snapshot_is_picked_up(tmp_path):
+    data, _ = clustered(20, 8, 1)
+    reader = LocalIndex(str(tmp_path), 8, quantization="none")
+    writer = LocalIndex(str(tmp_path), 8, quantization="none")
+    writer.upsert(records(data))
+    writer.flush()
+    assert reader.describe_index_stats()["total_vector_count"] == 20
+
+
+def test_flush_appends_only_new_rows(tmp_path):
+    data, _ = clustered(300, 8, 1)
+    idx = LocalIndex(str(tmp_path), 8, quantization="int8")
+    idx.upsert(records(data[:200]))
+    idx.flush()
+    vectors = os.path.join(str(tmp_path), "vectors.0.f32")
+    with open(vectors, "rb") as f:
+        before = f.read()
+    idx.upsert(records(data[200:], 200))
+    idx.flush()
+    with open(vectors, "rb") as f:
+        after = f.read()
+    assert after[:len(before)] == before
+    assert len(after) == 300 * 8 * 4
+    assert idx.count() == 300
+    assert idx.codes.shape == (300, 8)
+
+
+def test_updates_and_deletes_are_tombstoned_then_compacted(tmp_path):
+    data, _ = clustered(100, 8, 1)
+    idx = LocalIndex(str(tmp_path), 8, quantization="none")
+    idx.upsert(records(data))
+    idx.flush()
+
+    idx.upsert([{"id": "0", "values": data[50].tolist(), "metadata": {"row": "moved"}}])
+    idx.delete(["1", "2"])
+    idx.flush()
+    assert idx._manifest["epoch"] == 0 and idx._manifest["rows"] == 101
+    assert idx.count() == 98
+    ids = [m["id"] for m in idx.query(data[1].tolist(), top_k=98)["matches"]]
+    assert "1" not in ids and "2" not in ids and len(ids) == len(set(ids))
+    assert idx.query(data[50].tolist(), top_k=2)["matches"][0]["id"] in ("0", "50")
+    assert [m["id"] for m in idx.query(data[0].tolist(), top_k=5, filter={"row": "moved"})["matches"]] == ["0"]
+
+    # A quarter of the stored rows dead: the live ones move to a fresh epoch
+    idx.delete([str(i) for i in range(3, 30)])
+    idx.flush()
+    assert idx._manifest["epoch"] == 1 and idx._manifest["rows"] == 71
+    assert not os.path.exists(os.path.join(str(tmp_path), "vectors.0.f32"))
+    reopened = LocalIndex(str(tmp_path), 8, quantization="none")
+    assert reopened.count() == 71
+    assert reopened.metadata_at(reopened._positions["0"]) == {"row": "moved"}
+
+
+def test_metadata_stays_in_the_sidecar(tmp_path):
+    data, _ = clustered(20, 8, 1)
+    idx = LocalIndex(str(tmp_path), 8, quantization="none")
+    idx.upsert(records(data))
+    idx.flush()
+    with open(os.path.join(str(tmp_path), "meta.json")) as f:
+        manifest = json.load(f)
+    assert "ids" not in manifest and "metadata" not in manifest
+    assert not hasattr(idx, "metadata")
+    assert idx.metadata_at(idx._positions["7"]) == {"row": 7}
+
+
+def test_single_file_snapshot_is_migrated(tmp_path):
+    data, queries = clustered(30, 8, 1)
+    vectors = data / np.linalg.norm(data, axis=1, keepdims=True)
+    np.save(os.path.join(str(tmp_path), "vectors.npy"), vectors.astype(np.float32))
+    with open(os.path.join(str(tmp_path), "meta.json"), "w") as f:
+        json.dump({"dimension": 8, "ids": [str(i) for i in range(30)],
+                   "metadata": [{"row": i} for i in range(30)]}, f)
+    idx = LocalIndex(str(tmp_path), 8, quantization="int8")
+    assert idx.count() == 30 and idx.codes is not None
+    assert not os.path.exists(os.path.join(str(tmp_path), "vectors.npy"))
+    match = idx.query(data[4].tolist(), top_k=1)["matches"][0]
+    assert match["id"] == "4" and match["metadata"] == {"row": 4}
@@ -0,0 +1,84 @@
+import pytest
+
+import src.app_config as app_config
+from src.app_config import ModelsConfig
+from src.degradation import CircuitBreaker, CircuitOpen
+from src.model_router import ModelRouter
+
+
+def tier(model, fallback=None, timeout=5):
+    return {"model": model, "max_tokens": 100, "temperature": 0, "timeout": timeout, "fallback": fallback}
+
+
+CONFIG = {
+    "tiers": {"fast": tier("small", "standard"), "standard": tier("medium", "strong"),
+              "strong": tier("large"), "mock": tier("mock")},
+    "routes": {"small_talk": "fast", "business_data": "standard"},
+    "long_context_chars": 1000,
+    "long_context_tier": "strong",
+    "default_tier": "standard",
+}
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+class ScriptedRouter(ModelRouter):
+    """Router whose tiers answer or fail as scripted, without calling a provider"""
+
+    def __init__(self, failing=(), **kwargs):
+        super().__init__(CONFIG, **kwargs)
+        self.failing = set(failing)
+        self.calls = []
+
+    def _call(self, tier, messages):
+        self.calls.append(tier["model"])
+        if tier["model"] in self.failing:
+            raise TimeoutError(f"{tier['model']} timed out")
+        return f"answer from {tier['model']}"
+
+
+def test_tier_follows_intent_then_context_size():
+    router = ModelRouter(CONFIG, mock=False)
+    assert router.select("small_talk") == "fast"
+    assert router.select("business_data") == "standard"
+    assert router.select("unrouted") == "standard"
+    assert router.select("small_talk", context_chars=5000) == "strong"
+
+
+def test_failover_walks_the_fallback_chain():
+    router = ScriptedRouter(failing={"small", "medium"}, mock=False)
+    assert router.complete(MESSAGES, "small_talk") == ("answer from large", "strong")
+    assert router.calls == ["small", "medium", "large"]
+
+
+def test_last_error_is_raised_when_every_tier_fails_and_the_breaker_opens():
+    router = ScriptedRouter(failing={"medium", "large"}, mock=False)
+    router.breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=60)
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            router.complete(MESSAGES, "business_data")
+    with pytest.raises(CircuitOpen):
+        router.complete(MESSAGES, "business_data")
+
+
+def test_mock_tier_answers_offline():
+    router = ModelRouter(CONFIG, mock=True)
+    text, name = router.complete(MESSAGES, "business_data")
+    assert name == "mock"
+    assert text == "[mock] You asked: hello"
+
+
+def test_mock_without_a_mock_tier_falls_back_to_routing():
+    config = {**CONFIG, "tiers": {k: v for k, v in CONFIG["tiers"].items() if k != "mock"}}
+    assert ModelRouter(config, mock=True).select("small_talk") == "fast"
+
+
+def test_config_requires_a_mock_tier_under_llm_mock(monkeypatch):
+    monkeypatch.setattr(app_config, "LLM_MOCK", True)
+    ModelsConfig(**CONFIG)
+    with pytest.raises(ValueError, match="mock"):
+        ModelsConfig(**{**CONFIG, "tiers": {"standard": tier("medium")}, "routes": {}, "long_context_tier": None})
+
+
+def test_config_rejects_unknown_tier_references():
+    with pytest.raises(ValueError, match="unknown tiers"):
+        ModelsConfig(**{**CONFIG, "routes": {"general": "huge"}})
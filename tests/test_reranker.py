@@ -0,0 +1,47 @@
+import threading
+import time
+
+from src.reranker import Reranker, lexical_scores
+
+
+def matches(n):
+    return [{"id": str(i), "score": 1.0 - i / 100, "metadata": {"text": f"passage {i} about revenue"}} for i in range(n)]
+
+
+def test_lexical_scores_prefer_query_terms():
+    scores = lexical_scores("fraud cash out", ["fraud cash out spike", "quarterly revenue"], [0.5, 0.5])
+    assert scores[0] > scores[1]
+
+
+def test_rerank_keeps_top_k_and_drops_duplicate_passages():
+    reranker = Reranker("lexical", budget_ms=1000)
+    items = matches(3) + [{"id": "dup", "score": 0.1, "metadata": {"text": "passage 0 about revenue"}}]
+    ranked = reranker.rerank("passage 0", items, top_k=4)
+    assert [m["id"] for m, _ in ranked] == ["0", "1", "2"]
+    assert all(score is not None for _, score in ranked)
+
+
+def test_slow_scoring_times_out_and_does_not_hold_later_requests():
+    release = threading.Event()
+    reranker = Reranker("lexical", budget_ms=50, threads=1)
+    reranker._score = lambda query, passages, vector_scores: release.wait(5) and vector_scores
+
+    start = time.perf_counter()
+    ranked = reranker.rerank("q", matches(5), top_k=2)
+    assert [score for _, score in ranked] == [None, None]
+    assert time.perf_counter() - start < 0.5
+    # The stuck scoring still occupies the only thread: skip instead of queueing
+    reranker.rerank("q", matches(5), top_k=2)
+    assert reranker.counts["over_budget"] == 1
+    assert reranker.counts["saturated"] == 1
+
+    release.set()
+    reranker.pool.shutdown(wait=True)
+    assert reranker._slots.acquire(blocking=False)
+
+
+def test_budget_counts_from_the_request_start():
+    reranker = Reranker("lexical", budget_ms=50)
+    ranked = reranker.rerank("q", matches(5), top_k=2, started=time.perf_counter() - 1)
+    assert [score for _, score in ranked] == [None, None]
+    assert reranker.counts["over_budget"] == 1
@@ -0,0 +1,33 @@
+import multiprocessing
+
+from src.shared_cache import SharedCache, cache_key
+
+
+def write_from_child(path, key):
+    SharedCache("embeddings", path).put(key, b"from child")
+
+
+def test_entries_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SharedCache("embeddings", path)
+    cache.put("parent", b"from parent")
+
+    child = multiprocessing.get_context("fork").Process(target=write_from_child, args=(path, "child"))
+    child.start()
+    child.join(10)
+    assert child.exitcode == 0
+
+    assert cache.get_many(["parent", "child", "missing"]) == {"parent": b"from parent", "child": b"from child"}
+    assert cache.stats() == {"hits": 2, "misses": 1}
+
+
+def test_tables_are_separate_and_trimmed(tmp_path, monkeypatch):
+    import src.shared_cache as shared_cache
+    monkeypatch.setattr(shared_cache, "EVICT_EVERY", 10)
+    path = str(tmp_path / "cache.db")
+    answers, embeddings = SharedCache("answers", path, max_entries=5), SharedCache("embeddings", path)
+    embeddings.put(cache_key("q"), b"vector")
+    answers.put_many((str(i), b"x") for i in range(10))
+    assert len(answers.get_many(str(i) for i in range(10))) == 5
+    assert answers.get(cache_key("q")) is None
+    assert embeddings.get(cache_key("q")) == b"vector"
@@ -0,0 +1,42 @@
+import pytest
+
+from src.summary_store import SUMMARY_COLLECTION, SummaryStore, summary_domains
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, *args, **kwargs):
+        return list(self.docs)
+
+
+@pytest.fixture
+def store():
+    docs = [{"domain": d, "summary": f"{d} is fine"} for d in ("fraud", "revenue", "market")]
+    return SummaryStore({SUMMARY_COLLECTION: FakeCollection(docs)})
+
+
+def test_extractive_summary_skips_values_that_are_not_numbers():
+    text = SummaryStore._extractive("revenue", {"rows": 1200, "total_sales": 1234.5, "max_sales": None,
+                                                "region": "North", "flag": True}, None)
+    assert text == "Revenue summary. Key metrics: rows 1,200, total sales 1,234.5"
+    assert SummaryStore._extractive("fraud", {"max_amount": None}, None) == "Fraud summary."
+
+
+@pytest.mark.parametrize("query, domains", [
+    ("fraud overview", ["fraud"]),
+    ("brief me on the latest revenue performance", ["revenue"]),
+    ("summarize the business", ["fraud", "revenue", "market"]),
+    ("summary of transaction 15", []),
+    ("summarize the Acme account", []),
+    ("overview of how to reset my password", []),
+    ("what are the top fraud risks", []),
+])
+def test_only_domain_level_questions_get_canned_summaries(query, domains):
+    assert summary_domains(query) == domains
+
+
+def test_answer_short_circuits_only_domain_level_questions(store):
+    assert store.answer("give me a fraud overview") == "**Fraud**: fraud is fine"
+    assert store.answer("can you summarize this email thread") is None
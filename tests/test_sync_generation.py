@@ -0,0 +1,154 @@
+import threading
+
+import pytest
+
+import src.vector_db_pipeline as pipeline
+from src.local_index import LocalIndexSet
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = iter(docs)
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.docs)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCollection:
+    def __init__(self, docs=None, fail=False):
+        self.docs = list(docs or [])
+        self.fail = fail
+        self.cursors = []
+
+    def find(self, *args, **kwargs):
+        if self.fail:
+            raise ConnectionError("cursor died")
+        self.cursors.append(FakeCursor(self.docs))
+        return self.cursors[-1]
+
+    def find_one(self, filter=None, sort=None, projection=None):
+        if filter:
+            return next((d for d in self.docs if all(d.get(k) == v for k, v in filter.items())), None)
+        return self.docs[-1] if self.docs else None
+
+    def find_one_and_update(self, filter, update, upsert=False, return_document=None):
+        doc = self.find_one(filter)
+        if doc is None:
+            doc = dict(filter)
+            self.docs.append(doc)
+        for key, step in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + step
+        return doc
+
+    def update_one(self, filter, update, upsert=False):
+        doc = self.find_one(filter)
+        if doc is None:
+            doc = dict(filter)
+            self.docs.append(doc)
+        doc.update(update.get("$set", {}))
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+def fake_embeddings(texts):
+    return [[1.0] + [0.0] * (pipeline.EMBEDDING_DIM - 1) for _ in texts]
+
+
+@pytest.fixture
+def fake_backends(tmp_path, monkeypatch):
+    db = FakeDatabase()
+    for name, prefix in pipeline.INPUT_COLLECTIONS.items():
+        db[name] = FakeCollection([{"_id": f"{prefix}-{i}", "content": f"{name} row {i}"} for i in range(3)])
+    index = LocalIndexSet(str(tmp_path), pipeline.EMBEDDING_DIM, quantization="none")
+    monkeypatch.setattr(pipeline, "tenant_db", lambda tenant=None: db)
+    monkeypatch.setattr(pipeline, "index", index)
+    monkeypatch.setattr(pipeline, "_index_versions", {})
+    monkeypatch.setattr(pipeline, "_sync_embedder", None)
+    monkeypatch.setattr(pipeline, "get_embeddings", fake_embeddings)
+    monkeypatch.setattr(pipeline, "get_embedding", lambda text: fake_embeddings([text])[0])
+    return db, index
+
+
+def test_complete_sync_commits_a_new_generation(fake_backends):
+    db, index = fake_backends
+    fingerprints = pipeline.sync_generation()
+    assert all(fingerprints[name] for name in pipeline.INPUT_COLLECTIONS)
+    versions = pipeline.get_index_versions("default")
+    assert versions.generation() == 1
+    live = index.describe_index_stats()["namespaces"][versions.namespace()]["vector_count"]
+    assert live == 3 * len(pipeline.INPUT_COLLECTIONS)
+
+
+def test_failed_read_aborts_and_keeps_the_live_generation(fake_backends):
+    db, index = fake_backends
+    assert pipeline.sync_generation() is not None
+    versions = pipeline.get_index_versions("default")
+    live_namespace = versions.namespace()
+
+    db["Revenue_LLM_Input"].fail = True
+    assert pipeline.sync_generation() is None
+    versions._checked = 0  # skip the pointer cache
+    assert versions.namespace() == live_namespace
+    # The half-built generation was dropped
+    assert index.describe_index_stats()["namespaces"].keys() == {live_namespace}
+
+
+def test_failed_upsert_aborts(fake_backends, monkeypatch):
+    db, index = fake_backends
+    monkeypatch.setattr(pipeline, "SYNC_UPSERT_RETRIES", 1)
+    monkeypatch.setattr(index, "upsert", lambda *args, **kwargs: (_ for _ in ()).throw(TimeoutError("upsert")))
+    assert pipeline.sync_generation() is None
+    assert pipeline.get_index_versions("default").generation() == 0
+
+
+def test_failed_embeddings_abort(fake_backends, monkeypatch):
+    db, index = fake_backends
+    assert pipeline.sync_generation() is not None
+    live_namespace = pipeline.get_index_versions("default").namespace()
+
+    # get_embeddings swallows provider errors and returns None vectors
+    monkeypatch.setattr(pipeline, "get_embeddings", lambda texts: [None] * len(texts))
+    assert pipeline.sync_generation() is None
+    versions = pipeline.get_index_versions("default")
+    versions._checked = 0
+    assert versions.namespace() == live_namespace
+    assert index.describe_index_stats()["namespaces"][live_namespace]["vector_count"] > 0
+
+
+def test_empty_documents_do_not_count_as_failures(fake_backends):
+    db, index = fake_backends
+    db["Market_LLM_Input"].docs.append({"_id": "blank", "content": "  "})
+    assert pipeline.sync_generation() is not None
+
+
+def test_embedding_error_releases_the_reader_and_waits_for_upserts(fake_backends, monkeypatch):
+    db, index = fake_backends
+    db["Fraud_LLM_Input"].docs = [{"_id": i, "content": f"fraud row {i}"} for i in range(50)]
+    monkeypatch.setattr(pipeline, "SYNC_EMBED_BATCH_SIZE", 1)
+    monkeypatch.setattr(pipeline, "SYNC_QUEUE_SIZE", 1)
+    calls = []
+
+    def overloaded_after_a_few(texts):
+        calls.append(texts)
+        if len(calls) > 3:
+            raise RuntimeError("embedding is overloaded")
+        return fake_embeddings(texts)
+
+    monkeypatch.setattr(pipeline, "get_embeddings", overloaded_after_a_few)
+    monkeypatch.setattr(pipeline, "INPUT_COLLECTIONS", {"Fraud_LLM_Input": "fraud_input"})
+    assert pipeline.sync_generation() is None
+    assert not [t for t in threading.enumerate() if t.name.startswith("sync-reader-")]
+    assert all(cursor.closed for cursor in db["Fraud_LLM_Input"].cursors)
+    # The aborted namespace was dropped after its upserts finished, so it stays gone
+    assert index.describe_index_stats()["namespaces"] == {}
@@ -0,0 +1,72 @@
+import pytest
+from starlette.requests import Request
+
+import src.main as main
+import src.tenants as tenants
+import src.vector_db_pipeline as pipeline
+from src.auth import Authenticator, Unauthorized, parse_api_keys
+from src.tenants import TenantMismatch, UnknownTenant, current_tenant, resolve_tenant
+
+
+@pytest.fixture(autouse=True)
+def two_tenants(monkeypatch):
+    monkeypatch.setattr(tenants, "TENANTS", ["acme", "globex"])
+    monkeypatch.setattr(main, "authenticator", Authenticator(parse_api_keys("k-acme:dash:acme,k-ops:ops")))
+    monkeypatch.setattr(main.rate_limiter, "rate", 0)
+
+
+def http_request(headers=None, peer="10.0.0.1"):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "POST", "path": "/chat", "headers": raw, "client": (peer, 1234)})
+
+
+def test_keys_bind_a_tenant_and_unknown_tenants_fail_at_parse():
+    keys = parse_api_keys("k1:dash:ACME, k2:ops")
+    assert keys == {"k1": ("dash", "acme"), "k2": ("ops", None)}
+    with pytest.raises(UnknownTenant):
+        parse_api_keys("k3:x:initech")
+    with pytest.raises(ValueError):
+        parse_api_keys("k4")
+
+
+def test_tenant_comes_from_the_key_not_the_header():
+    caller, rejection = main.admit(http_request({"Authorization": "Bearer k-acme"}))
+    assert rejection is None and caller == "dash"
+    assert current_tenant.get() == "acme"
+
+    # Anonymous callers cannot pick a tenant with the header
+    _, rejection = main.admit(http_request({"X-Tenant-Id": "acme"}))
+    assert rejection.status_code == 403
+    # Nor can a key bound to one tenant reach another
+    _, rejection = main.admit(http_request({"X-API-Key": "k-acme", "X-Tenant-Id": "globex"}))
+    assert rejection.status_code == 403
+
+
+def test_unbound_keys_and_anonymous_callers_get_the_default_tenant():
+    main.admit(http_request({"X-API-Key": "k-ops"}))
+    assert current_tenant.get() == tenants.DEFAULT_TENANT
+    assert resolve_tenant(None, "Default") == tenants.DEFAULT_TENANT
+    with pytest.raises(TenantMismatch):
+        resolve_tenant(None, "acme")
+
+
+def test_unknown_keys_are_rejected():
+    with pytest.raises(Unauthorized):
+        main.authenticator.authenticate({"X-API-Key": "nope"}, "10.0.0.1")
+    _, rejection = main.admit(http_request({"X-API-Key": "nope"}))
+    assert rejection.status_code == 401
+
+
+def test_tenants_get_separate_namespaces_and_files():
+    assert tenants.tenant_db_name("acme") == "acme_db"
+    assert tenants.tenant_path("/data/analytics.db", "acme") == "/data/analytics.acme.db"
+    assert tenants.tenant_path("/data/analytics.db", tenants.DEFAULT_TENANT) == "/data/analytics.db"
+    assert pipeline.get_index_versions("acme")._namespace_re.match("acme-gen-3")
+    assert not pipeline.get_index_versions("acme")._namespace_re.match("gen-3")
+
+
+def test_sync_embeddings_carry_the_tenant(monkeypatch):
+    seen = []
+    monkeypatch.setattr(pipeline, "_sync_embedder", lambda texts, tenant: seen.append(tenant) or [None] * len(texts))
+    pipeline.sync_embeddings(["a"], "globex")
+    assert seen == ["globex"]